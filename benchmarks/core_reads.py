@@ -0,0 +1,54 @@
+"""Benchmark reading a collection through ORM instances and ``to_dict()``
+against the Core ``SELECT`` path used by :meth:`sandman2.service.Service._fetch`.
+
+Run from the root of the repository::
+
+    $ python benchmarks/core_reads.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import warnings
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from sqlalchemy.exc import SAWarning  # pylint: disable=wrong-import-position
+
+from sandman2 import get_app, db  # pylint: disable=wrong-import-position
+
+ROUNDS = 20
+
+
+def main():
+    """Print the rows/sec achieved by each read path over the Track table of
+    the test database."""
+    warnings.simplefilter('ignore', SAWarning)
+    directory = tempfile.mkdtemp()
+    database = os.path.join(directory, 'db.sqlite3')
+    shutil.copy(os.path.join('tests', 'data', 'db.sqlite3'), database)
+    app = get_app('sqlite+pysqlite:///{}'.format(database))
+    with app.app_context():
+        model = [cls.__model__ for cls in app.classes if cls.__model__.__name__ == 'Track'][0]
+        rows = model.query.count()
+        serialize = model.serializer().for_rows()
+
+        def orm():
+            """Read the table as ORM instances."""
+            db.session.expunge_all()
+            return [resource.to_dict() for resource in model.query.all()]
+
+        def core():
+            """Read the table with a Core select."""
+            return [serialize(row) for row in db.session.execute(model.query.statement)]
+
+        assert orm() == core()
+        for name, function in (('ORM', orm), ('Core', core)):
+            seconds = min(timeit.repeat(function, number=1, repeat=ROUNDS))
+            print('{:>5}: {:>10.0f} rows/sec'.format(name, rows / seconds))
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
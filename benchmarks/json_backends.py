@@ -0,0 +1,56 @@
+"""Benchmark encoding collections of the test (Chinook) database with each
+installed JSON backend of :mod:`sandman2.encoder`.
+
+Run from the root of the repository::
+
+    $ python benchmarks/json_backends.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import warnings
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from sqlalchemy.exc import SAWarning  # pylint: disable=wrong-import-position
+
+from sandman2 import get_app, db  # pylint: disable=wrong-import-position
+from sandman2.encoder import get_dumps  # pylint: disable=wrong-import-position
+
+ROUNDS = 20
+TABLES = ('Track', 'Invoice', 'InvoiceLine')
+
+
+def main():
+    """Print the time taken by each backend to encode each table."""
+    warnings.simplefilter('ignore', SAWarning)
+    directory = tempfile.mkdtemp()
+    database = os.path.join(directory, 'db.sqlite3')
+    shutil.copy(os.path.join('tests', 'data', 'db.sqlite3'), database)
+    app = get_app('sqlite+pysqlite:///{}'.format(database))
+    with app.app_context():
+        models = {cls.__model__.__name__: cls.__model__ for cls in app.classes}
+        for table in TABLES:
+            model = models[table]
+            serialize = model.serializer().for_rows(convert=False)
+            collection = {'resources': [
+                serialize(row) for row in db.session.execute(model.query.statement)]}
+            print('{} ({} rows)'.format(table, len(collection['resources'])))
+            for backend in ('json', 'ujson', 'orjson'):
+                try:
+                    dumps = get_dumps(backend)
+                except ImportError:
+                    print('{:>8}: not installed'.format(backend))
+                    continue
+                seconds = min(timeit.repeat(
+                    lambda: dumps(collection), number=1, repeat=ROUNDS))
+                size = len(dumps(collection))
+                print('{:>8}: {:>8.2f} ms {:>8.1f} MB/s'.format(
+                    backend, seconds * 1000, size / seconds / 1e6))
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark building and compiling a filtered collection query for every
+request against reusing a statement from
+:class:`sandman2.statements.StatementCache`.
+
+Run from the root of the repository::
+
+    $ python benchmarks/statement_cache.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import warnings
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from sqlalchemy import bindparam, desc  # pylint: disable=wrong-import-position
+from sqlalchemy.exc import SAWarning  # pylint: disable=wrong-import-position
+
+from sandman2 import get_app, db  # pylint: disable=wrong-import-position
+from sandman2.statements import StatementCache  # pylint: disable=wrong-import-position
+
+QUERIES = 2000
+
+
+def main():
+    """Print the queries/sec achieved with and without the statement cache
+    for a small filtered, sorted and limited query of the Track table."""
+    warnings.simplefilter('ignore', SAWarning)
+    directory = tempfile.mkdtemp()
+    database = os.path.join(directory, 'db.sqlite3')
+    shutil.copy(os.path.join('tests', 'data', 'db.sqlite3'), database)
+    app = get_app('sqlite+pysqlite:///{}'.format(database))
+    with app.app_context():
+        model = [cls.__model__ for cls in app.classes if cls.__model__.__name__ == 'Track'][0]
+        cache = StatementCache()
+        mapper = model.__mapper__
+
+        def build(album, genre):
+            """Return the query for one request."""
+            return model.query.filter(
+                model.AlbumId == bindparam('album', album),
+                model.GenreId.in_(bindparam('genres', genre, expanding=True)),
+                ).order_by(desc(model.Name)).limit(bindparam('limit', 5))
+
+        def uncached():
+            """Build and compile the query for every request."""
+            for number in range(QUERIES):
+                statement = build(number % 300, [1, 2, 3]).statement
+                db.session.execute(statement, mapper=mapper).fetchall()
+
+        def cached():
+            """Reuse the statement (and its compiled form)."""
+            for number in range(QUERIES):
+                statement = cache.get(('Track', 'benchmark'), lambda: build(0, [0]).statement)
+                cache.execute(
+                    db.session.connection(mapper=mapper), statement,
+                    {'album': number % 300, 'genres': [1, 2, 3], 'limit': 5}).fetchall()
+
+        for name, function in (('Uncached', uncached), ('Cached', cached)):
+            seconds = min(timeit.repeat(function, number=1, repeat=5))
+            print('{:>8}: {:>8.0f} queries/sec'.format(name, QUERIES / seconds))
+    shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,7 @@
 # Start sandman2
 
 if [ "$DB_TYPE" = "sqlite" ]; then
-    sandman2ctl $DB_TYPE+$DB_DRIVER:////$DATABASE
+    sandman2ctl --workers $WORKERS --threads $THREADS $DB_TYPE+$DB_DRIVER:////$DATABASE
 else
-    sandman2ctl $DB_TYPE+$DB_DRIVER://$USERNAME:$PASSWORD@$DB_HOST:$DB_PORT/$DATABASE
+    sandman2ctl --workers $WORKERS --threads $THREADS $DB_TYPE+$DB_DRIVER://$USERNAME:$PASSWORD@$DB_HOST:$DB_PORT/$DATABASE
 fi
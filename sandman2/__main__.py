@@ -4,6 +4,7 @@ services automatically from existing databases."""
 
 import argparse
 from sandman2 import get_app
+from sandman2.server import check_workers, patch_for_greenlets, serve_async, serve_workers
 
 
 def main():
@@ -51,10 +52,190 @@ def main():
         '--enable-cors',
         help='Enable Cross Origin Resource Sharing (CORS)',
         default=False)
+    parser.add_argument(
+        '-j',
+        '--json-backend',
+        help='Library used to encode JSON responses',
+        choices=['json', 'orjson', 'ujson', 'auto'],
+        default='json')
+    parser.add_argument(
+        '--etag',
+        help='Compute ETags from response content or from table versions',
+        choices=['content', 'version'],
+        default='content')
+    parser.add_argument(
+        '--cache-size',
+        help='Cache up to this many bytes of GET responses in memory',
+        type=int,
+        default=0)
+    parser.add_argument(
+        '--cache-ttl',
+        help='Number of seconds cached responses remain valid',
+        type=float,
+        default=None)
+    parser.add_argument(
+        '--cache-url',
+        help='URL of a Redis server used to share cached responses between '
+             'processes, e.g. redis://localhost:6379/0',
+        default=None)
+    parser.add_argument(
+        '--stream-collections',
+        help='Stream unpaginated collections as rows are read from the database',
+        action='store_true',
+        default=False)
+    parser.add_argument(
+        '--bulk-batch-size',
+        help='Maximum number of rows inserted per statement when a list of '
+             'resources is POSTed',
+        type=int,
+        default=1000)
+    parser.add_argument(
+        '--no-probe-existing',
+        help='Create POSTed resources without first searching for an identical '
+             'existing resource',
+        dest='probe_existing',
+        action='store_false',
+        default=True)
+    parser.add_argument(
+        '--statement-cache-size',
+        help='Number of collection query shapes whose SQL statements are cached '
+             '(0 to disable)',
+        type=int,
+        default=100)
+    parser.add_argument(
+        '--pool-size',
+        help='Number of database connections kept open',
+        type=int,
+        default=None)
+    parser.add_argument(
+        '--max-overflow',
+        help='Number of connections that may be opened beyond the pool size',
+        type=int,
+        default=None)
+    parser.add_argument(
+        '--pool-timeout',
+        help='Seconds to wait for a free connection before failing',
+        type=float,
+        default=None)
+    parser.add_argument(
+        '--pool-recycle',
+        help='Seconds after which connections are replaced',
+        type=int,
+        default=None)
+    parser.add_argument(
+        '--pool-pre-ping',
+        help='Test connections for liveness before use',
+        action='store_true',
+        default=False)
+    parser.add_argument(
+        '--statement-timeout',
+        help='Seconds after which a database statement is aborted',
+        type=float,
+        default=None)
+    parser.add_argument(
+        '--replica',
+        help='URI of a read replica of the database to serve GET requests '
+             'from (may be given more than once)',
+        dest='replicas',
+        action='append',
+        default=None)
+    parser.add_argument(
+        '--replica-strategy',
+        help='How the replica serving each GET request is chosen',
+        choices=['round-robin', 'least-connections'],
+        default='round-robin')
+    parser.add_argument(
+        '--primary-header',
+        help='Header making a GET request read from the primary database '
+             '(to see its own writes)',
+        default='X-Read-Your-Writes')
+    parser.add_argument(
+        '--replica-cache-ttl',
+        help='Seconds responses read from a replica remain in the response cache',
+        type=float,
+        default=5)
+    parser.add_argument(
+        '--reflection-cache',
+        help='File in which the reflected tables are stored, so that later '
+             'starts needn\'t reflect the database while its schema is unchanged',
+        default=None)
+    parser.add_argument(
+        '--reflection-refresh',
+        help='Seconds between checks for schema changes, which update the '
+             'reflection cache',
+        type=float,
+        default=None)
+    parser.add_argument(
+        '--lazy',
+        help='Reflect each table on the first request for it rather than on '
+             'start (tables are then not available in the admin interface)',
+        action='store_true',
+        default=False)
+    parser.add_argument(
+        '--async',
+        help='Serve requests concurrently in greenlets, so that requests '
+             'waiting on the database don\'t block each other (requires gevent)',
+        dest='use_async',
+        action='store_true',
+        default=False)
+    parser.add_argument(
+        '--async-connections',
+        help='Maximum number of requests handled at once with --async',
+        type=int,
+        default=1000)
+    parser.add_argument(
+        '-w',
+        '--workers',
+        help='Serve requests from this many gunicorn worker processes '
+             '(requires gunicorn) instead of the development server',
+        type=int,
+        default=None)
+    parser.add_argument(
+        '--threads',
+        help='Number of threads serving requests in each worker process',
+        type=int,
+        default=1)
+    parser.add_argument(
+        '--keep-alive',
+        help='Seconds to wait for the next request on a keep-alive connection',
+        type=int,
+        default=2)
+    parser.add_argument(
+        '--backlog',
+        help='Maximum number of connections waiting to be accepted',
+        type=int,
+        default=2048)
 
 
     args = parser.parse_args()
-    app = get_app(args.URI, read_only=args.read_only, schema=args.schema)
+    if args.use_async:
+        patch_for_greenlets()
+    app = get_app(
+        args.URI,
+        read_only=args.read_only,
+        schema=args.schema,
+        json_backend=args.json_backend,
+        stream_collections=args.stream_collections,
+        etag=args.etag,
+        cache_size=args.cache_size,
+        cache_ttl=args.cache_ttl,
+        cache_url=args.cache_url,
+        bulk_batch_size=args.bulk_batch_size,
+        probe_existing=args.probe_existing,
+        statement_cache_size=args.statement_cache_size,
+        pool_size=args.pool_size,
+        max_overflow=args.max_overflow,
+        pool_timeout=args.pool_timeout,
+        pool_recycle=args.pool_recycle,
+        pool_pre_ping=args.pool_pre_ping,
+        statement_timeout=args.statement_timeout,
+        replica_uris=args.replicas,
+        replica_strategy=args.replica_strategy,
+        primary_header=args.primary_header,
+        replica_cache_ttl=args.replica_cache_ttl,
+        reflection_cache=args.reflection_cache,
+        reflection_refresh=args.reflection_refresh,
+        lazy=args.lazy)
     if args.enable_cors:
         from flask_cors import CORS
         CORS(app)
@@ -65,7 +246,25 @@ def main():
     else:
         host = '0.0.0.0'
     app.config['SECRET_KEY'] = '42'
-    app.run(host=host, port=int(args.port))
+    if args.workers:
+        try:
+            check_workers(app, args.workers)
+        except ValueError as exception:
+            parser.error(str(exception))
+        serve_workers(
+            app,
+            host,
+            int(args.port),
+            workers=args.workers,
+            threads=args.threads,
+            keep_alive=args.keep_alive,
+            backlog=args.backlog,
+            use_async=args.use_async,
+            connections=args.async_connections)
+    elif args.use_async:
+        serve_async(app, host, int(args.port), connections=args.async_connections)
+    else:
+        app.run(host=host, port=int(args.port))
 
 if __name__ == '__main__':
     main()
@@ -1,10 +1,15 @@
 """Sandman2 main application setup code."""
 
 # Third-party imports
-from flask import Flask, current_app, jsonify
+from flask import Flask, current_app, request
+from sqlalchemy import create_engine, inspect, Column, MetaData, Table
 from sqlalchemy.sql import sqltypes
 
 # Application imports
+from sandman2.cache import ResponseCache, SharedCache
+from sandman2.dispatcher import Dispatcher
+from sandman2.encoder import get_dumps, jsonify
+from sandman2.engine import engine_options, set_statement_timeout, MeasuredQueuePool
 from sandman2.exception import (
     BadRequestException,
     ForbiddenException,
@@ -16,7 +21,13 @@ from sandman2.exception import (
     ServiceUnavailableException,
     )
 from sandman2.service import Service
-from sandman2.model import db, Model, AutomapModel
+from sandman2.model import db, Model, AutomapModel, map_table
+from sandman2.reflection import ReflectionSnapshot
+from sandman2.replicas import DEFAULT_PRIMARY_HEADER, ReplicaSet
+from sandman2.schema import Schema
+from sandman2.serializer import Serializer
+from sandman2.statements import StatementCache
+from sandman2.versions import TableVersions, SharedTableVersions
 from sandman2.admin import CustomAdminView
 from flask_admin import Admin
 from flask_httpauth import HTTPBasicAuth
@@ -31,7 +42,29 @@ def get_app(
         user_models=None,
         reflect_all=True,
         read_only=False,
-        schema=None):
+        schema=None,
+        json_backend='json',
+        stream_collections=False,
+        etag='content',
+        cache_size=0,
+        cache_ttl=None,
+        cache_url=None,
+        bulk_batch_size=1000,
+        probe_existing=True,
+        statement_cache_size=100,
+        pool_size=None,
+        max_overflow=None,
+        pool_timeout=None,
+        pool_recycle=None,
+        pool_pre_ping=False,
+        statement_timeout=None,
+        replica_uris=None,
+        replica_strategy='round-robin',
+        primary_header=DEFAULT_PRIMARY_HEADER,
+        replica_cache_ttl=5,
+        reflection_cache=None,
+        reflection_refresh=None,
+        lazy=False):
     """Return an application instance connected to the database described in
     *database_uri*.
 
@@ -43,21 +76,121 @@ def get_app(
     :param bool reflect_all: Include all database tables in the API service
     :param bool read_only: Only allow HTTP GET commands for all endpoints
     :param str schema: Use the specified named schema instead of the default
+    :param str json_backend: The library used to encode JSON responses
+                             (``json``, ``orjson``, ``ujson`` or ``auto``)
+    :param bool stream_collections: Stream unpaginated collections to the
+                                    client as rows are read from the database
+    :param str etag: How ETags are computed: ``content`` (a hash of each
+                     response) or ``version`` (from the number of writes made
+                     to the resource's table through this application)
+    :param int cache_size: The maximum number of bytes of ``GET`` responses to
+                           cache in memory (default: no caching)
+    :param float cache_ttl: The number of seconds cached responses remain
+                            valid (default: until the table is written)
+    :param str cache_url: The URL of a Redis server through which responses
+                          are cached and table versions shared by all
+                          processes (overrides *cache_size*)
+    :param int bulk_batch_size: The maximum number of rows inserted by each
+                                statement when a list of resources is POSTed
+    :param bool probe_existing: Search for an existing resource with the same
+                                fields before creating one which has no
+                                primary key or unique constraint values
+    :param int statement_cache_size: The number of collection query shapes
+                                     whose SQL statements are cached (``0``
+                                     disables the cache)
+    :param int pool_size: The number of database connections kept open
+    :param int max_overflow: The number of connections that may be opened
+                             beyond *pool_size* under load
+    :param float pool_timeout: The number of seconds to wait for a free
+                               connection before failing
+    :param int pool_recycle: The number of seconds after which connections
+                             are replaced
+    :param bool pool_pre_ping: Test connections for liveness before use
+    :param float statement_timeout: The number of seconds after which a
+                                    statement is aborted (PostgreSQL, MySQL
+                                    and SQLite only)
+    :param list replica_uris: The URI connection strings of read replicas of
+                              the database, from which ``GET`` requests are
+                              served
+    :param str replica_strategy: How replicas are chosen: ``round-robin`` or
+                                 ``least-connections``
+    :param str primary_header: The header which makes a ``GET`` request read
+                               from the primary database instead of a replica
+    :param float replica_cache_ttl: The number of seconds responses read
+                                    from a replica remain in the response
+                                    cache (replicas may lag behind writes)
+    :param str reflection_cache: The path of a file in which a snapshot of
+                                 the reflected tables is stored, and from
+                                 which they are loaded on start while the
+                                 database's schema is unchanged
+    :param float reflection_refresh: The number of seconds between checks
+                                     for schema changes, after which the
+                                     snapshot is taken again (default: only
+                                     on start)
+    :param bool lazy: Reflect each table, and register its service, on the
+                      first request for it rather than on start (tables are
+                      then not added to the admin interface)
     """
     app = Flask('sandman2')
     app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
     app.config['SANDMAN2_READ_ONLY'] = read_only
+    app.config['SANDMAN2_JSON_BACKEND'] = json_backend
+    get_dumps(json_backend)  # fail early if the backend isn't installed
+    app.config['SANDMAN2_STREAM_COLLECTIONS'] = stream_collections
+    app.config['SANDMAN2_ETAG'] = etag
+    app.config['SANDMAN2_BULK_BATCH_SIZE'] = bulk_batch_size
+    app.config['SANDMAN2_POST_PROBE'] = probe_existing
+    if statement_cache_size:
+        app.extensions['sandman2_statements'] = StatementCache(statement_cache_size)
+    if cache_url:
+        import redis  # pylint: disable=import-error
+        use_shared_cache(app, redis.Redis.from_url(cache_url), cache_ttl)
+    else:
+        app.extensions['sandman2_versions'] = versions = TableVersions()
+        if cache_size:
+            cache = app.extensions['sandman2_cache'] = ResponseCache(cache_size, cache_ttl)
+            versions.add_listener(cache.invalidate)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    pool_options = {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pool_pre_ping,
+        }
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_uri, **pool_options)
+    app.config['SANDMAN2_PRIMARY_HEADER'] = primary_header
+    app.config['SANDMAN2_REPLICA_CACHE_TTL'] = replica_cache_ttl
     app.classes = []
     db.init_app(app)
+    if statement_timeout:
+        with app.app_context():
+            set_statement_timeout(db.engine, statement_timeout)
+    if replica_uris:
+        engines = [
+            create_engine(uri, **engine_options(uri, **pool_options))
+            for uri in replica_uris]
+        if statement_timeout:
+            for engine in engines:
+                set_statement_timeout(engine, statement_timeout)
+        app.extensions['sandman2_replicas'] = ReplicaSet(engines, replica_strategy)
     admin = Admin(app, base_template='layout.html', template_mode='bootstrap3')
     _register_error_handlers(app)
     if user_models:
         with app.app_context():
             _register_user_models(user_models, admin, schema=schema)
+    elif reflect_all and lazy:
+        with app.app_context():
+            _register_lazy(app, exclude_tables, read_only, schema=schema)
     elif reflect_all:
         with app.app_context():
-            _reflect_all(exclude_tables, admin, read_only, schema=schema)
+            snapshot = None
+            if reflection_cache:
+                snapshot = ReflectionSnapshot(reflection_cache, db.engine, schema)
+                app.extensions['sandman2_reflection'] = snapshot
+            _reflect_all(exclude_tables, admin, read_only, schema=schema, snapshot=snapshot)
+        if reflection_cache and reflection_refresh:
+            snapshot.refresh_periodically(reflection_refresh)
 
     @app.route('/')
     def index():
@@ -67,10 +200,42 @@ def get_app(
             routes[cls.__model__.__name__] = '{}{{/{}}}'.format(
                 cls.__model__.__url__,
                 cls.__model__.primary_key())
+        if 'sandman2_dispatcher' in app.extensions:
+            for name, url in app.extensions['sandman2_dispatcher'].urls().items():
+                routes.setdefault(name, url)
         return jsonify(routes)
+
+    @app.route('/_metrics')
+    def metrics():
+        """Return the counters of the application's caches and connection
+        pool."""
+        stats = {}
+        if 'sandman2_cache' in app.extensions:
+            stats['cache'] = app.extensions['sandman2_cache'].stats()
+        if 'sandman2_statements' in app.extensions:
+            stats['statements'] = app.extensions['sandman2_statements'].stats()
+        if isinstance(db.engine.pool, MeasuredQueuePool):
+            stats['pool'] = db.engine.pool.stats()
+        if 'sandman2_replicas' in app.extensions:
+            stats['replicas'] = app.extensions['sandman2_replicas'].stats()
+        return jsonify(stats)
     return app
 
 
+def use_shared_cache(app, client, ttl=None):
+    """Cache *app*'s responses and share its table versions (used for
+    invalidation and version-based ETags) through a Redis server, so that
+    every process serving the database sees the others' writes.
+
+    :param app: The application instance
+    :param client: A :class:`redis.Redis` (or compatible) client
+    :param float ttl: The number of seconds cached responses remain valid
+    """
+    app.extensions['sandman2_versions'] = versions = SharedTableVersions(client)
+    app.extensions['sandman2_cache'] = cache = SharedCache(client, ttl)
+    versions.add_listener(cache.invalidate)
+
+
 def _register_error_handlers(app):
     """Register error-handlers for the application.
 
@@ -114,6 +279,12 @@ def register_service(cls, primary_key_type):
     if 'POST' in methods:  # pylint: disable=no-member
         current_app.add_url_rule(
             cls.__model__.__url__ + '/', view_func=view_func, methods=['POST', ])
+    collection_methods = methods & {'PATCH', 'DELETE'}
+    if collection_methods:
+        current_app.add_url_rule(
+            cls.__model__.__url__ + '/', defaults={'resource_id': None},
+            view_func=view_func,
+            methods=collection_methods)
     current_app.add_url_rule(
         '{resource}/<{pk_type}:{pk}>'.format(
             resource=cls.__model__.__url__,
@@ -123,14 +294,22 @@ def register_service(cls, primary_key_type):
     current_app.classes.append(cls)
 
 
-def _reflect_all(exclude_tables=None, admin=None, read_only=False, schema=None):
+def _reflect_all(exclude_tables=None, admin=None, read_only=False, schema=None, snapshot=None):
     """Register all tables in the given database as services.
 
     :param list exclude_tables: A list of tables to exclude from the API
                                 service
+    :param snapshot: The :class:`sandman2.reflection.ReflectionSnapshot`
+                     from which the tables are loaded, if any
     """
-    AutomapModel.prepare(  # pylint:disable=maybe-no-member
-        db.engine, reflect=True, schema=schema)
+    if snapshot is None:
+        AutomapModel.prepare(  # pylint:disable=maybe-no-member
+            db.engine, reflect=True, schema=schema)
+    else:
+        for table in snapshot.metadata().tables.values():
+            if table.key not in AutomapModel.metadata.tables:
+                table.tometadata(AutomapModel.metadata)
+        AutomapModel.prepare()  # pylint:disable=maybe-no-member
     for cls in AutomapModel.classes:
         if exclude_tables and cls.__table__.name in exclude_tables:
             continue
@@ -139,12 +318,90 @@ def _reflect_all(exclude_tables=None, admin=None, read_only=False, schema=None):
         register_model(cls, admin)
 
 
+def _register_lazy(app, exclude_tables=None, read_only=False, schema=None):
+    """Route requests for the resources of all tables in the given database
+    through a :class:`sandman2.dispatcher.Dispatcher`, which reflects each
+    table on the first request for it.
+
+    :param app: The application instance
+    :param list exclude_tables: A list of tables to exclude from the API
+                                service
+    """
+    table_names = [
+        name for name in inspect(db.engine).get_table_names(schema=schema)
+        if not (exclude_tables and name in exclude_tables)]
+
+    served = set(table_names)
+
+    def load(name):
+        """Reflect and map the table *name*, and return its service class and
+        primary key type.
+
+        Only the table itself is reflected: the tables it references are
+        stood in for by tables of just the referenced columns (so that its
+        foreign keys resolve), and links to them are built from its foreign
+        keys."""
+        metadata = MetaData()
+        metadata.reflect(db.engine, schema=schema, only=[name], resolve_fks=False)
+        table = metadata.tables['{}.{}'.format(schema, name) if schema else name]
+        foreign_links = {}
+        for constraint in table.foreign_key_constraints:
+            for element in constraint.elements:
+                referred_schema, referred, column = element._column_tokens  # pylint: disable=protected-access
+                key = '{}.{}'.format(referred_schema, referred) if referred_schema else referred
+                if key not in metadata.tables or column not in metadata.tables[key].c:
+                    Table(referred, metadata, Column(column),
+                          schema=referred_schema, extend_existing=True)
+            if len(constraint.elements) == 1 and referred_schema == schema and referred in served:
+                foreign_links.setdefault(
+                    referred.lower(), (element.parent.name, '/{}'.format(referred.lower())))
+        cls = map_table(table, foreign_links)
+        if cls is None:
+            return None  # tables without a primary key aren't served
+        if read_only:
+            cls.__methods__ = {'GET'}
+        service_class, primary_key_type = _build_service(cls)
+        app.classes.append(service_class)
+        return service_class, primary_key_type
+
+    dispatcher = app.extensions['sandman2_dispatcher'] = Dispatcher(table_names, load)
+
+    def dispatch(table, resource_id=None, meta=False):
+        """Pass the request to the service of *table*."""
+        return dispatcher.dispatch(request.method, table, resource_id, meta)
+
+    app.add_url_rule(
+        '/<table>/', 'sandman2_collection', view_func=dispatch,
+        methods=['GET', 'POST', 'PATCH', 'DELETE'])
+    app.add_url_rule(
+        '/<table>/meta', 'sandman2_meta', view_func=dispatch,
+        defaults={'meta': True}, methods=['GET'])
+    app.add_url_rule(
+        '/<table>/<resource_id>', 'sandman2_resource', view_func=dispatch,
+        methods=['GET', 'PUT', 'PATCH', 'DELETE'])
+
+
 def register_model(cls, admin=None):
     """Register *cls* to be included in the API service
 
     :param cls: Class deriving from :class:`sandman2.models.Model`
     """
+    service_class, primary_key_type = _build_service(cls)
+    register_service(service_class, primary_key_type)
+    if admin is not None:
+        admin.add_view(CustomAdminView(cls, db.session))
+
+
+def _build_service(cls):
+    """Return the service class of the model *cls*, and the type (as a
+    string) of its primary key field.
+
+    :param cls: Class deriving from :class:`sandman2.models.Model`
+    :rtype: tuple
+    """
     cls.__url__ = '/{}'.format(cls.__name__.lower())
+    cls.__serializer__ = Serializer(cls)
+    cls.__schema__ = Schema(cls)
     service_class = type(
         cls.__name__ + 'Service',
         (Service,),
@@ -166,11 +423,7 @@ def register_model(cls, admin=None):
             primary_key_type = 'int'
         elif isinstance(col_type, sqltypes.Numeric):
             primary_key_type = 'float'
-
-    # registration
-    register_service(service_class, primary_key_type)
-    if admin is not None:
-        admin.add_view(CustomAdminView(cls, db.session))
+    return service_class, primary_key_type
 
 
 def _register_user_models(user_models, admin=None, schema=None):
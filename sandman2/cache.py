@@ -0,0 +1,238 @@
+"""Caching of rendered responses to ``GET`` requests."""
+
+# Standard library imports
+import collections
+import hashlib
+import json
+import math
+import threading
+import time
+
+#: The prefix of the keys used in shared cache servers.
+DEFAULT_PREFIX = 'sandman2:'
+
+
+def _shortest(*ttls):
+    """Return the shortest of the given time-to-live values which are set, or
+    ``None`` if none is."""
+    ttls = [ttl for ttl in ttls if ttl]
+    return min(ttls) if ttls else None
+
+
+class CacheBackend(object):
+
+    """The interface of the stores used to cache responses.
+
+    Keys are tuples whose first element is the (schema-qualified) name of the
+    table the response was read from, and whose second element is that
+    table's version. Cached responses are ``(body, status, headers)`` tuples.
+    """
+
+    def get(self, key):
+        """Return the response cached under *key*, or ``None``.
+
+        :param tuple key: The cache key
+        :rtype: tuple
+        """
+        raise NotImplementedError
+
+    def set(self, key, response, ttl=None):
+        """Cache *response* under *key*.
+
+        :param tuple key: The cache key
+        :param tuple response: The ``(body, status, headers)`` of the response
+        :param float ttl: The number of seconds the entry remains valid, if
+                          less than the cache's own
+        """
+        raise NotImplementedError
+
+    def invalidate(self, table):
+        """Remove all entries read from *table*.
+
+        :param str table: The (schema-qualified) name of the table
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """Return the cache's counters.
+
+        :rtype: dict
+        """
+        raise NotImplementedError
+
+
+class ResponseCache(CacheBackend):
+
+    """An in-process LRU cache of responses, bounded by the total size of the
+    cached bodies, whose entries expire after a fixed time.
+
+    Entries are grouped by the table they were read from, so every entry for a
+    table can be dropped (with :meth:`invalidate`) when the table is written.
+    """
+
+    def __init__(self, max_bytes, ttl=None):
+        """Create an empty cache.
+
+        :param int max_bytes: The maximum total size of the cached responses
+        :param float ttl: The number of seconds entries remain valid (default:
+                          until evicted or invalidated)
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the response cached under *key*, or ``None``.
+
+        :param tuple key: The cache key, whose first element is the table name
+        :rtype: tuple
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] < time.time():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, response, ttl=None):
+        """Cache *response* under *key*, evicting the least recently used
+        entries to make room for it.
+
+        :param tuple key: The cache key, whose first element is the table name
+        :param tuple response: The ``(body, status, headers)`` of the response
+        :param float ttl: The number of seconds the entry remains valid, if
+                          less than the cache's own
+        """
+        size = len(response[0])
+        if size > self.max_bytes:
+            return
+        ttl = _shortest(ttl, self.ttl)
+        expires = time.time() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while self._entries and self.size + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            self._entries[key] = (expires, size, response)
+            self.size += size
+
+    def invalidate(self, table):
+        """Remove all entries read from *table*.
+
+        :param str table: The (schema-qualified) name of the table
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == table]:
+                self._remove(key)
+                self.invalidations += 1
+
+    def stats(self):
+        """Return the cache's counters.
+
+        :rtype: dict
+        """
+        return {
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            }
+
+    def _remove(self, key):
+        """Remove the entry stored under *key*. The caller must hold the
+        lock."""
+        self.size -= self._entries.pop(key)[1]
+
+
+class SharedCache(CacheBackend):
+
+    """A cache of responses stored in a Redis (or Redis-protocol compatible)
+    server, shared by every process serving the same database.
+
+    Since keys contain the version of their table, entries become unreachable
+    as soon as the table's (shared) version is bumped by any process, and are
+    left to expire after *ttl* seconds or to be evicted by the server.
+    """
+
+    def __init__(self, client, ttl=None, prefix=DEFAULT_PREFIX):
+        """Store responses through *client*.
+
+        :param client: A :class:`redis.Redis` (or compatible) client
+        :param float ttl: The number of seconds entries remain valid (default:
+                          until evicted by the server)
+        :param str prefix: The prefix of all keys used
+        """
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the response cached under *key*, or ``None``.
+
+        :param tuple key: The cache key
+        :rtype: tuple
+        """
+        value = self.client.get(self._key(key))
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        header, body = value.split(b'\n', 1)
+        status, headers = json.loads(header.decode('utf-8'))
+        return body, status, [tuple(header) for header in headers]
+
+    def set(self, key, response, ttl=None):
+        """Cache *response* under *key*.
+
+        :param tuple key: The cache key
+        :param tuple response: The ``(body, status, headers)`` of the response
+        :param float ttl: The number of seconds the entry remains valid, if
+                          less than the cache's own
+        """
+        body, status, headers = response
+        header = json.dumps([status, headers]).encode('utf-8')
+        ttl = _shortest(ttl, self.ttl)
+        seconds = int(math.ceil(ttl)) if ttl else None
+        self.client.set(self._key(key), header + b'\n' + body, ex=seconds)
+
+    def invalidate(self, table):
+        """Count the invalidation of *table*'s entries, which is achieved by
+        bumping its version.
+
+        :param str table: The (schema-qualified) name of the table
+        """
+        self.invalidations += 1
+
+    def stats(self):
+        """Return this process' counters.
+
+        :rtype: dict
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            }
+
+    def _key(self, key):
+        """Return the server key for the cache key *key*."""
+        return self.prefix + 'response:' + hashlib.sha1(
+            repr(key).encode('utf-8')).hexdigest()
@@ -1,14 +1,29 @@
 """Decorators for sandman2 convenience functions."""
 import functools
 import hashlib
-from flask import jsonify, request, make_response
+import json
+from flask import current_app, g, request, make_response
+from sqlalchemy.exc import DBAPIError
 
+from sandman2.encoder import jsonify
 from sandman2.exception import BadRequestException
+from sandman2.model import db
+from sandman2.replicas import REPLICA_KEY
 
 
 def etag(func):
     """Return a decorator that generates proper ETag values for a response.
 
+    By default, the ETag is a hash of the rendered response. If the
+    ``SANDMAN2_ETAG`` configuration value is ``version``, the ETag is instead
+    derived from the version of the service's table (see
+    :mod:`sandman2.versions`) and the request, so conditional requests are
+    answered without calling the view function at all.
+
+    Version ETags aren't used if the application has read replicas: a
+    replica's data may be older than the table version it would be tagged
+    with.
+
     :param func: view function
     """
     @functools.wraps(func)
@@ -18,24 +33,119 @@ def etag(func):
         # only for HEAD and GET requests
         assert request.method in ['HEAD', 'GET'],\
             '@etag is only supported for GET requests'
+        if (current_app.config.get('SANDMAN2_ETAG') == 'version' and
+                'sandman2_replicas' not in current_app.extensions):
+            model = args[0].__model__
+            etag_value = version_etag(model)
+            # user-defined validation must still run for each request
+            if not hasattr(model, 'is_valid_get'):
+                response = _conditional_response(etag_value)
+                if response is not None:
+                    response.headers['ETag'] = etag_value
+                    return response
+            response = make_response(func(*args, **kwargs))
+            response.headers['ETag'] = etag_value
+            return _conditional_response(etag_value) or response
         response = func(*args, **kwargs)
         response = make_response(response)
+        if response.is_streamed:
+            # Hashing the body would mean buffering the whole stream
+            return response
         etag_value = '"' + hashlib.md5(response.get_data()).hexdigest() + '"'
         response.headers['ETag'] = etag_value
-        if_match = request.headers.get('If-Match')
-        if_none_match = request.headers.get('If-None-Match')
-        if if_match:
-            etag_list = [tag.strip() for tag in if_match.split(',')]
-            if etag_value not in etag_list and '*' not in etag_list:
-                response = precondition_failed()
-        elif if_none_match:
-            etag_list = [tag.strip() for tag in if_none_match.split(',')]
-            if etag_value in etag_list or '*' in etag_list:
-                response = not_modified()
+        return _conditional_response(etag_value) or response
+    return wrapped
+
+
+def cached(func):
+    """Return a decorator that serves responses from the application's
+    :class:`sandman2.cache.ResponseCache`, if one is configured.
+
+    Responses are cached by table, table version, path, query string and
+    ``Accept`` header. Responses for models with an ``is_valid_get`` hook are
+    never cached, since the hook may reject a request a cached response would
+    otherwise be served to.
+
+    Requests carrying the ``SANDMAN2_PRIMARY_HEADER`` header bypass the cache
+    when the application has read replicas, and responses read from a
+    replica (which may not reflect the table's latest version yet) are only
+    cached for ``SANDMAN2_REPLICA_CACHE_TTL`` seconds.
+
+    :param func: view function
+    """
+    @functools.wraps(func)
+    def wrapped(*args, **kwargs):
+        """Return the cached response for the request, or call the view
+        function and cache its response."""
+        cache = current_app.extensions.get('sandman2_cache')
+        model = args[0].__model__
+        if cache is None or hasattr(model, 'is_valid_get'):
+            return func(*args, **kwargs)
+        if ('sandman2_replicas' in current_app.extensions and
+                current_app.config['SANDMAN2_PRIMARY_HEADER'] in request.headers):
+            return func(*args, **kwargs)
+        table = model.__table__.fullname
+        key = (
+            table,
+            current_app.extensions['sandman2_versions'].get(table),
+            request.path,
+            tuple(sorted(request.args.items(multi=True))),
+            str(request.accept_mimetypes))
+        entry = cache.get(key)
+        if entry is not None:
+            body, status, headers = entry
+            response = current_app.response_class(body, status=status, headers=headers)
+            response.headers['X-Cache'] = 'HIT'
+            return response
+        response = make_response(func(*args, **kwargs))
+        if response.status_code == 200 and not response.is_streamed:
+            ttl = None
+            if REPLICA_KEY in db.session().info:
+                ttl = current_app.config['SANDMAN2_REPLICA_CACHE_TTL']
+            cache.set(
+                key,
+                (response.get_data(), response.status_code, list(response.headers)),
+                ttl=ttl)
+        response.headers['X-Cache'] = 'MISS'
         return response
     return wrapped
 
 
+def version_etag(model):
+    """Return an ETag value for the current request on *model*'s service,
+    based on the version of the model's table rather than on the response.
+
+    :param model: The :class:`sandman2.model.Model` being requested
+    :rtype: str
+    """
+    versions = current_app.extensions['sandman2_versions']
+    table = model.__table__.fullname
+    validator = '{}:{}:{}:{}:{}'.format(
+        versions.token,
+        table,
+        versions.get(table),
+        request.full_path,
+        request.accept_mimetypes)
+    return '"' + hashlib.md5(validator.encode('utf-8')).hexdigest() + '"'
+
+
+def _conditional_response(etag_value):
+    """Return the response to send if the request's ``If-Match`` or
+    ``If-None-Match`` headers are not satisfied by *etag_value*, or ``None``
+    if the full response should be sent."""
+    if_match = request.headers.get('If-Match')
+    if_none_match = request.headers.get('If-None-Match')
+    if if_match:
+        etag_list = [tag.strip() for tag in if_match.split(',')]
+        if etag_value not in etag_list and '*' not in etag_list:
+            return precondition_failed()
+    elif if_none_match:
+        etag_list = [tag.strip() for tag in if_none_match.split(',')]
+        if etag_value in etag_list or '*' in etag_list:
+            return not_modified()
+    return None
+
+
 def not_modified():
     """Return an HTTP 304 response if the resource hasn't been modified based
     on the ETag value."""
@@ -51,23 +161,78 @@ def precondition_failed():
     return response
 
 
+def read_from_replica(func):
+    """A decorator executing the statements of a view on one of the
+    application's read replicas (if any are configured), unless the request
+    carries the ``SANDMAN2_PRIMARY_HEADER`` header.
+
+    If the replica can't be reached, the view is run again on the primary
+    database.
+    """
+    @functools.wraps(func)
+    def decorated(*args, **kwargs):
+        """The decorator function."""
+        replicas = current_app.extensions.get('sandman2_replicas')
+        if replicas is None or current_app.config['SANDMAN2_PRIMARY_HEADER'] in request.headers:
+            return func(*args, **kwargs)
+        engine = replicas.choose()
+        if engine is None:
+            return func(*args, **kwargs)
+        session = db.session()
+        session.info[REPLICA_KEY] = engine
+        try:
+            return func(*args, **kwargs)
+        except DBAPIError:
+            if not replicas.failed(engine):
+                raise
+            # the replica couldn't be reached: read from the primary instead
+            session.rollback()
+            del session.info[REPLICA_KEY]
+            return func(*args, **kwargs)
+    return decorated
+
+
+def request_data():
+    """Return the JSON data sent with the current request: an object, or a
+    list of objects if a JSON array or newline-delimited JSON
+    (``application/x-ndjson``) was sent. Returns ``None`` if no data could be
+    decoded.
+    """
+    if 'sandman2_data' not in g:
+        if request.mimetype == 'application/x-ndjson':
+            try:
+                data = [
+                    json.loads(line)
+                    for line in request.get_data(as_text=True).splitlines()
+                    if line.strip()]
+            except ValueError:
+                raise BadRequestException('Invalid newline-delimited JSON')
+        else:
+            data = request.get_json(force=True, silent=True)
+        g.sandman2_data = data
+    return g.sandman2_data
+
+
 def validate_fields(func):
     """A decorator to automatically detect missing required fields from
-    json data."""
+    json data.
+
+    If a list of objects is sent, only its structure is checked here; each
+    object must be validated (with
+    :meth:`sandman2.schema.Schema.validation_error`) by the view.
+    """
     @functools.wraps(func)
     def decorated(instance, *args, **kwargs):
         """The decorator function."""
-        data = request.get_json(force=True, silent=True)
+        data = request_data()
         if not data:
             raise BadRequestException('No data received from request')
-        for key in data:
-            if key not in (
-                    instance.__model__.required() +
-                    instance.__model__.optional()):
-                raise BadRequestException('Unknown field [{}]'.format(key))
-        missing = set(instance.__model__.required()) - set(data)
-        if missing:
-            message = 'The following required fields are missing: ' + ', '.join(missing)
+        if isinstance(data, list):
+            if not all(isinstance(item, dict) for item in data):
+                raise BadRequestException('Expected a list of JSON objects')
+            return func(instance, *args, **kwargs)
+        message = instance.__model__.schema().validation_error(data)
+        if message:
             raise BadRequestException(message)
         return func(instance, *args, **kwargs)
     return decorated
@@ -0,0 +1,100 @@
+"""Lazy registration of the database's tables.
+
+Instead of reflecting every table and registering its routes on start, the
+application can list the database's table names and route every request for
+a resource through a :class:`Dispatcher`, which reflects the resource's
+table and builds its service the first time the table is requested.
+"""
+
+# Standard library imports
+import threading
+
+# Third-party imports
+from flask import abort
+from werkzeug.exceptions import MethodNotAllowed
+
+#: The functions converting a resource ID from the URL into a value of the
+#: primary key's type (as named by :func:`sandman2.app.register_service`)
+PRIMARY_KEY_CONVERTERS = {
+    'int': int,
+    'float': float,
+    'string': str,
+    }
+
+
+class Dispatcher(object):
+
+    """Routes requests to the services of tables, building each service on
+    the first request for its table.
+    """
+
+    def __init__(self, table_names, load):
+        """Create a dispatcher for the tables named *table_names*.
+
+        :param list table_names: The names of the tables which may be served
+        :param load: A function reflecting the table with the given name and
+                     returning its :class:`sandman2.service.Service` class and
+                     primary key type, or ``None`` if the table can't be served
+        """
+        #: A URL name->table name dictionary
+        self.table_names = {name.lower(): name for name in table_names}
+        self._load = load
+        self._services = {}
+        self._lock = threading.Lock()
+
+    def urls(self):
+        """Return the URL of each table's collection, by table name.
+
+        :rtype: dict
+        """
+        return {name: '/' + url_name for url_name, name in self.table_names.items()}
+
+    def _service(self, url_name):
+        """Return the service class, view function and primary key converter
+        of the table whose URL name is *url_name*, loading the table if it
+        wasn't loaded before."""
+        name = self.table_names.get(url_name)
+        if name is None:
+            abort(404)
+        if name not in self._services:
+            with self._lock:
+                if name not in self._services:
+                    loaded = self._load(name)
+                    if loaded is not None:
+                        service_class, primary_key_type = loaded
+                        loaded = (
+                            service_class,
+                            service_class.as_view(service_class.__name__.lower()),
+                            PRIMARY_KEY_CONVERTERS[primary_key_type])
+                    self._services[name] = loaded
+        service = self._services[name]
+        if service is None:
+            abort(404)
+        return service
+
+    def dispatch(self, method, table, resource_id=None, meta=False):
+        """Return the response of the service of *table* to a request.
+
+        :param str method: The request's HTTP method
+        :param str table: The table's URL name
+        :param str resource_id: The resource ID from the URL, if any
+        :param bool meta: ``True`` for a request for the table's ``/meta``
+        """
+        service_class, view, convert = self._service(table)
+        methods = set(service_class.__model__.__methods__)
+        if meta:
+            allowed = methods & {'GET'}
+        elif resource_id is None:
+            allowed = methods - {'PUT'}
+        else:
+            allowed = methods - {'POST'}
+        if method not in allowed and not (method == 'HEAD' and 'GET' in allowed):
+            raise MethodNotAllowed(valid_methods=sorted(allowed))
+        if meta or (method == 'POST' and resource_id is None):
+            return view()
+        if resource_id is not None:
+            try:
+                resource_id = convert(resource_id)
+            except ValueError:
+                abort(404)
+        return view(resource_id=resource_id)
@@ -0,0 +1,181 @@
+"""Pluggable JSON encoding of sandman2 responses.
+
+The backend is chosen with the ``SANDMAN2_JSON_BACKEND`` configuration value:
+
+* ``json`` (the default): the standard library encoder, through Flask
+* ``orjson`` or ``ujson``: the named third-party encoder, which must be
+  installed
+* ``auto``: the fastest of the above that is installed
+
+Every backend serializes ``Decimal``, ``datetime.datetime`` and
+``datetime.time`` values the same way as
+:class:`sandman2.serializer.Serializer`, so dictionaries need not be converted
+before they are encoded.
+"""
+
+# Standard library imports
+import datetime
+from decimal import Decimal
+
+# Third-party imports
+from flask import current_app
+from flask import json as flask_json
+from werkzeug.http import http_date
+
+#: Backends tried, in order, when ``SANDMAN2_JSON_BACKEND`` is ``auto``.
+AUTO_BACKENDS = ('orjson', 'ujson', 'json')
+
+_DUMPS = {}
+
+
+def _default(value):
+    """Return a JSON-serializable representation of *value*, a type not
+    natively supported by the encoder."""
+    if isinstance(value, Decimal):
+        return float(value)
+    elif isinstance(value, datetime.datetime):
+        return value.isoformat()
+    elif isinstance(value, datetime.time):
+        return value.strftime("%H:%M:%S")
+    elif isinstance(value, datetime.date):
+        return http_date(value.timetuple())
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
+class JSONEncoder(flask_json.JSONEncoder):
+
+    """Flask's JSON encoder, extended to handle ``Decimal``,
+    ``datetime.datetime`` and ``datetime.time`` values."""
+
+    def default(self, o):  # pylint: disable=method-hidden
+        """Return a JSON-serializable representation of *o*."""
+        if isinstance(o, (Decimal, datetime.datetime, datetime.time)):
+            return _default(o)
+        return super(JSONEncoder, self).default(o)
+
+
+def _json_dumps():
+    """Return the ``dumps`` function of the standard library backend."""
+    def dumps(obj):
+        """Return *obj* encoded as JSON."""
+        return flask_json.dumps(
+            obj, cls=JSONEncoder, separators=(',', ':')).encode('utf-8')
+    return dumps
+
+
+def _orjson_dumps():
+    """Return the ``dumps`` function of the orjson backend."""
+    import orjson  # pylint: disable=import-error
+
+    def dumps(obj):
+        """Return *obj* encoded as JSON."""
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if current_app.config['JSON_SORT_KEYS']:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option)
+    return dumps
+
+
+def _ujson_dumps():
+    """Return the ``dumps`` function of the ujson backend."""
+    import ujson  # pylint: disable=import-error
+
+    def dumps(obj):
+        """Return *obj* encoded as JSON."""
+        return ujson.dumps(
+            obj,
+            default=_default,
+            ensure_ascii=current_app.config['JSON_AS_ASCII'],
+            sort_keys=current_app.config['JSON_SORT_KEYS'],
+            escape_forward_slashes=False).encode('utf-8')
+    return dumps
+
+
+_FACTORIES = {
+    'json': _json_dumps,
+    'orjson': _orjson_dumps,
+    'ujson': _ujson_dumps,
+}
+
+
+def get_dumps(backend):
+    """Return the function encoding an object as JSON (as bytes) with the named
+    *backend*.
+
+    :param str backend: ``auto``, ``json``, ``orjson`` or ``ujson``
+    :rtype: function
+    """
+    if backend not in _DUMPS:
+        if backend == 'auto':
+            for name in AUTO_BACKENDS:
+                try:
+                    _DUMPS[backend] = get_dumps(name)
+                    break
+                except ImportError:
+                    continue
+        elif backend in _FACTORIES:
+            _DUMPS[backend] = _FACTORIES[backend]()
+        else:
+            raise ValueError('Unknown JSON backend [{}]'.format(backend))
+    return _DUMPS[backend]
+
+
+def dumps(obj):
+    """Return *obj* encoded as JSON (as bytes) by the application's configured
+    backend."""
+    return get_dumps(current_app.config.get('SANDMAN2_JSON_BACKEND', 'json'))(obj)
+
+
+def iterencode_collection(name, resources, chunk_size=1000):
+    """Yield the JSON document ``{name: [resources...]}`` in pieces of (up to)
+    *chunk_size* resources, encoding each resource as it is produced.
+
+    The concatenated output is identical to that of :func:`jsonify` for the
+    same collection.
+
+    :param str name: The key of the collection
+    :param resources: An iterable of JSON-serializable resources
+    :param int chunk_size: The number of resources encoded per piece
+    """
+    dumps = get_dumps(current_app.config.get('SANDMAN2_JSON_BACKEND', 'json'))
+    yield b'{' + dumps(name) + b':['
+    separator = b''
+    chunk = []
+    for resource in resources:
+        chunk.append(dumps(resource))
+        if len(chunk) == chunk_size:
+            yield separator + b','.join(chunk)
+            separator = b','
+            chunk = []
+    if chunk:
+        yield separator + b','.join(chunk)
+    yield b']}\n'
+
+
+def iterencode_lines(resources, chunk_size=1000):
+    """Yield *resources* as newline-delimited JSON, in pieces of (up to)
+    *chunk_size* lines.
+
+    :param resources: An iterable of JSON-serializable resources
+    :param int chunk_size: The number of resources encoded per piece
+    """
+    dumps = get_dumps(current_app.config.get('SANDMAN2_JSON_BACKEND', 'json'))
+    chunk = []
+    for resource in resources:
+        chunk.append(dumps(resource) + b'\n')
+        if len(chunk) == chunk_size:
+            yield b''.join(chunk)
+            chunk = []
+    if chunk:
+        yield b''.join(chunk)
+
+
+def jsonify(obj):
+    """Return a Flask ``Response`` object containing *obj* encoded as JSON.
+
+    Unlike :func:`flask.jsonify`, the output is never pretty-printed.
+
+    :param obj: The JSON-serializable object to send
+    """
+    return current_app.response_class(
+        dumps(obj) + b'\n', mimetype=current_app.config['JSONIFY_MIMETYPE'])
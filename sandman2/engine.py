@@ -0,0 +1,180 @@
+"""Configuration and instrumentation of the database engine's connection
+pool."""
+
+# Standard library imports
+import threading
+import time
+
+# Third-party imports
+from sqlalchemy import event
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import QueuePool
+
+#: The key of the deadline of the statement being executed, in a pooled
+#: connection's ``info`` dictionary (used on SQLite)
+DEADLINE_KEY = 'sandman2_deadline'
+
+
+class MeasuredQueuePool(QueuePool):
+
+    """A :class:`sqlalchemy.pool.QueuePool` which records how long requests
+    for a connection wait before one is checked out (including the time
+    taken to open a new connection, when the pool isn't full).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(MeasuredQueuePool, self).__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        """Check out a connection, recording the time taken."""
+        start = time.monotonic()
+        try:
+            return super(MeasuredQueuePool, self)._do_get()
+        finally:
+            waited = time.monotonic() - start
+            with self._lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+    def stats(self):
+        """Return the pool's utilization and checkout wait times.
+
+        *utilization* is the fraction of the pool's capacity (its size plus
+        the allowed overflow) currently checked out.
+
+        :rtype: dict
+        """
+        checked_out = self.checkedout()
+        capacity = self.size() + max(self._max_overflow, 0)
+        return {
+            'size': self.size(),
+            'checked_out': checked_out,
+            'overflow': self.overflow(),
+            'utilization': checked_out / capacity if capacity else None,
+            'checkouts': self.checkouts,
+            'wait_seconds_total': self.wait_total,
+            'wait_seconds_max': self.wait_max,
+            'wait_seconds_mean': self.wait_total / self.checkouts if self.checkouts else None,
+            }
+
+
+def is_memory_database(url):
+    """Return ``True`` if *url* is that of an in-memory SQLite database.
+
+    :param url: The :class:`sqlalchemy.engine.url.URL` of the database
+    :rtype: bool
+    """
+    return url.drivername.startswith('sqlite') and url.database in (None, '', ':memory:')
+
+
+def engine_options(
+        database_uri,
+        pool_size=None,
+        max_overflow=None,
+        pool_timeout=None,
+        pool_recycle=None,
+        pool_pre_ping=False):
+    """Return the options with which the engine for *database_uri* should be
+    created (as ``SQLALCHEMY_ENGINE_OPTIONS``).
+
+    A :class:`MeasuredQueuePool` is used if the database's default pool is a
+    queue, or if any queue option is given (on SQLite, whose file databases
+    otherwise open a new connection for each checkout). The queue options
+    are ignored for in-memory SQLite databases, since each connection would
+    open a database of its own.
+
+    :param str database_uri: The URI connection string for the database
+    :param int pool_size: The number of connections kept open
+    :param int max_overflow: The number of connections that may be opened
+                             beyond *pool_size* under load
+    :param float pool_timeout: The number of seconds to wait for a connection
+                               before giving up
+    :param int pool_recycle: The number of seconds after which connections
+                             are replaced
+    :param bool pool_pre_ping: Test connections for liveness when checked out
+    :rtype: dict
+    """
+    options = {}
+    queue_options = {
+        name: value for name, value in (
+            ('pool_size', pool_size),
+            ('max_overflow', max_overflow),
+            ('pool_timeout', pool_timeout))
+        if value is not None}
+    url = make_url(database_uri)
+    default_pool = url.get_dialect().get_pool_class(url)
+    if is_memory_database(url):
+        queue_options = {}
+    if queue_options or issubclass(default_pool, QueuePool):
+        options['poolclass'] = MeasuredQueuePool
+        options.update(queue_options)
+        if url.drivername.startswith('sqlite'):
+            options['connect_args'] = {'check_same_thread': False}
+    if pool_recycle is not None:
+        options['pool_recycle'] = pool_recycle
+    if pool_pre_ping:
+        options['pool_pre_ping'] = True
+    return options
+
+
+def set_statement_timeout(engine, seconds):
+    """Abort statements executed through *engine* which run for longer than
+    *seconds*.
+
+    The database's own timeout is used on PostgreSQL (``statement_timeout``)
+    and MySQL (``max_execution_time``, which applies to ``SELECT`` statements
+    only). On SQLite, a progress handler interrupts statements that pass
+    their deadline. Returns ``False`` if the database is not supported.
+
+    Only the execution of a statement is bounded: on SQLite (and with
+    server-side cursors, such as those of streamed responses) rows fetched
+    after the statement has been executed aren't subject to the timeout.
+
+    :param engine: The :class:`sqlalchemy.engine.Engine` to configure
+    :param float seconds: The maximum duration of a statement
+    :rtype: bool
+    """
+    milliseconds = int(seconds * 1000)
+    name = engine.dialect.name
+    if name in ('postgresql', 'mysql'):
+        if name == 'postgresql':
+            statement = 'SET statement_timeout = {}'.format(milliseconds)
+        else:
+            statement = 'SET SESSION max_execution_time = {}'.format(milliseconds)
+
+        @event.listens_for(engine, 'connect')
+        def connect(dbapi_connection, connection_record):  # pylint: disable=unused-variable,unused-argument
+            """Set the timeout of a new connection."""
+            cursor = dbapi_connection.cursor()
+            cursor.execute(statement)
+            cursor.close()
+        return True
+    if name == 'sqlite':
+        @event.listens_for(engine, 'connect')
+        def connect(dbapi_connection, connection_record):  # pylint: disable=unused-variable,function-redefined
+            """Install the handler interrupting statements after their
+            deadline."""
+            info = connection_record.info
+
+            def interrupt():
+                """Return true if the current statement should be aborted."""
+                deadline = info.get(DEADLINE_KEY)
+                return deadline is not None and time.monotonic() > deadline
+            dbapi_connection.set_progress_handler(interrupt, 1000)
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(connection, *args):  # pylint: disable=unused-variable,unused-argument
+            """Set the deadline of the statement about to be executed."""
+            connection.connection.info[DEADLINE_KEY] = time.monotonic() + seconds
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(connection, *args):  # pylint: disable=unused-variable,unused-argument
+            """Clear the deadline of the statement executed."""
+            connection.connection.info.pop(DEADLINE_KEY, None)
+        return True
+    return False
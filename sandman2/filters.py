@@ -0,0 +1,118 @@
+"""Compilation of filter URL parameters into SQL criteria.
+
+A filter parameter has the form ``<field>=<value>`` (equality) or
+``<field>=<operator>:<value>``, where *operator* is one of:
+
+* ``eq``, ``ne``, ``gt``, ``gte``, ``lt``, ``lte``: comparisons
+* ``between``: ``between:<low>,<high>`` (inclusive)
+* ``in``: ``in:<value>,<value>,...``
+* ``like``: a SQL ``LIKE`` pattern (as are values starting with ``%``)
+
+The values ``isnull`` and ``notnull`` select rows where the field is (or
+isn't) ``NULL``. Numeric and boolean values are converted to the type of the
+field's column, so that comparisons are made (and indexes used) as the
+database would for literals of that type. Dates and times are compared as
+given, since SQLite stores them as text.
+"""
+
+# Standard library imports
+import operator
+
+# Third-party imports
+from sqlalchemy import bindparam
+
+#: Operators comparing a column to a single value
+COMPARISONS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+    }
+
+#: All operators which take values
+OPERATORS = frozenset(COMPARISONS) | {'between', 'in', 'like'}
+
+#: Operators which take no value
+NULL_OPERATORS = frozenset(('isnull', 'notnull'))
+
+
+def parse(value, coerce=None):
+    """Return the operator and the tuple of values of the filter *value*.
+
+    :param str value: The value of a filter URL parameter
+    :param coerce: The function converting strings to the field's type
+    :raises ValueError: if a value can't be converted, or the wrong number of
+                        values is given
+    :rtype: tuple
+    """
+    if value in NULL_OPERATORS:
+        return value, ()
+    name, separator, argument = value.partition(':')
+    if not separator or name not in OPERATORS:
+        if value.startswith('%'):
+            return 'like', (value,)
+        name, argument = 'eq', value
+    if name == 'like':
+        return name, (argument,)
+    if name in ('between', 'in'):
+        values = argument.split(',')
+        if name == 'between' and len(values) != 2:
+            raise ValueError('between requires two values')
+    else:
+        values = [argument]
+    if coerce is not None:
+        values = [coerce(item) for item in values]
+    return name, tuple(values)
+
+
+def bind(name, values, key):
+    """Return *values* (as returned by :func:`parse` for the operator *name*)
+    as bound parameters named after *key*, along with a dictionary of the
+    parameters' values.
+
+    The values of ``in`` are bound as a single "expanding" parameter, so the
+    statement is the same whatever the number of values.
+
+    :rtype: tuple
+    """
+    if name == 'in':
+        return bindparam(key, list(values), expanding=True), {key: list(values)}
+    params = {}
+    parameters = []
+    for index, value in enumerate(values):
+        params['{}_{}'.format(key, index)] = value
+        parameters.append(bindparam('{}_{}'.format(key, index), value))
+    return tuple(parameters), params
+
+
+def shape(name, values):
+    """Return a description of the filter with operator *name* and *values*
+    that is the same for every filter compiled into the same SQL (given
+    :func:`bind`).
+    """
+    if name == 'in':
+        return name
+    return name, len(values)
+
+
+def criterion(column, name, values):
+    """Return the SQL criterion applying the operator *name* to *column* and
+    *values* (as returned by :func:`parse` or :func:`bind`).
+
+    :param column: The column (or ORM attribute) to filter on
+    :param str name: The operator
+    :param tuple values: The operator's values
+    """
+    if name == 'isnull':
+        return column.is_(None)
+    elif name == 'notnull':
+        return column.isnot(None)
+    elif name == 'like':
+        return column.like(values[0], escape='/')
+    elif name == 'in':
+        return column.in_(values)
+    elif name == 'between':
+        return column.between(*values)
+    return COMPARISONS[name](column, values[0])
@@ -1,17 +1,51 @@
 """Module containing code related to *sandman2* ORM models."""
 
-# Standard library imports
-import datetime
-from decimal import Decimal
-
 # Third-party imports
+from sqlalchemy import text, UniqueConstraint
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.inspection import inspect
-from flask_sqlalchemy import SQLAlchemy  # pylint: disable=import-error,no-name-in-module
+from sqlalchemy.orm.interfaces import MANYTOONE
+from flask_sqlalchemy import SQLAlchemy as BaseSQLAlchemy, SignallingSession  # pylint: disable=import-error,no-name-in-module
+from sqlalchemy import orm
 from sqlalchemy.ext.automap import automap_base
 from sqlalchemy.ext.declarative import declarative_base
 
+# Application imports
+from sandman2.replicas import REPLICA_KEY
+from sandman2.schema import Schema
+from sandman2.serializer import Serializer
+
+
+class RoutingSession(SignallingSession):
+
+    """A session which executes its statements on the replica engine stored
+    in its ``info`` (see :func:`sandman2.decorators.read_from_replica`), if
+    any, rather than on the primary database.
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        """Return the engine statements for *mapper* are executed on."""
+        replica = self.info.get(REPLICA_KEY)
+        if replica is not None and (
+                mapper is None or not mapper.persist_selectable.info.get('bind_key')):
+            return replica
+        return super(RoutingSession, self).get_bind(mapper, clause)
+
+
+class SQLAlchemy(BaseSQLAlchemy):
+
+    """Flask-SQLAlchemy's extension, with sessions able to read from
+    replicas."""
+
+    def create_session(self, options):
+        """Return the factory of the sessions used by the application."""
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
 db = SQLAlchemy()
 
+
 class Model(object):
 
     """The sandman2 Model class is the base class for all RESTful resources.
@@ -25,6 +59,20 @@ class Model(object):
     #: The API version of this resource (not yet used).
     __version__ = '1'
 
+    #: The :class:`sandman2.serializer.Serializer` for this resource (built
+    #: when the model is registered).
+    __serializer__ = None
+
+    #: The :class:`sandman2.schema.Schema` describing this resource's fields
+    #: (built when the model is registered).
+    __schema__ = None
+
+    #: The links to the resources referenced by this resource's foreign keys,
+    #: as a link name->(column name, URL of the referenced table) dictionary.
+    #: Used instead of the model's relationships if set (for a table mapped
+    #: without the tables it references).
+    __foreign_links__ = None
+
     #: The HTTP methods this resource supports (default=all).
     __methods__ = {
         'GET',
@@ -44,12 +92,7 @@ class Model(object):
         :param cls: The Model class to gather attributes from
         :rtype: list
         """
-        columns = []
-        for column in cls.__table__.columns:  # pylint: disable=no-member
-            is_autoincrement = 'int' in str(column.type).lower() and column.autoincrement
-            if (not column.nullable and not column.primary_key) or (column.primary_key and not is_autoincrement):
-                columns.append(column.name)
-        return columns
+        return list(cls.schema().required)
 
     @classmethod
     def optional(cls):
@@ -57,11 +100,7 @@ class Model(object):
 
         :rtype: list
         """
-        columns = []
-        for column in cls.__table__.columns:  # pylint: disable=no-member
-            if column.nullable:
-                columns.append(column.name)
-        return columns
+        return list(cls.schema().optional)
 
     @classmethod
     def primary_key(cls):
@@ -73,21 +112,126 @@ class Model(object):
             cls.__table__.primary_key.columns)[  # pylint: disable=no-member
                 0].key
 
-    def to_dict(self):
+    @classmethod
+    def conflict_columns(cls, data):
+        """Return the names of the columns of the primary key, or of a unique
+        constraint, whose values are all given in *data*, or ``None`` if there
+        are none.
+
+        :param dict data: The fields of a new resource
+        :rtype: list
+        """
+        table = cls.__table__  # pylint: disable=no-member
+        keys = [table.primary_key.columns]
+        keys.extend(
+            constraint.columns for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint))
+        keys.extend(index.columns for index in table.indexes if index.unique)
+        for columns in keys:
+            names = [column.name for column in columns]
+            if names and all(name in data for name in names):
+                return names
+        return None
+
+    @classmethod
+    def insert_unless_conflicting(cls, data, conflict_columns):
+        """Insert a row containing *data* unless a row with the same values in
+        *conflict_columns* exists. Returns the new row's primary key, or
+        ``None`` if the row conflicted.
+
+        ``INSERT ... ON CONFLICT (<conflict_columns>) DO NOTHING`` is used on
+        PostgreSQL. Elsewhere, a plain ``INSERT`` is made: if it violates a
+        constraint, the session's transaction is rolled back, and the error is
+        raised again unless a row with the same values in *conflict_columns*
+        exists. (SQLite's ``INSERT OR IGNORE`` and MySQL's ``INSERT IGNORE``
+        would also ignore ``NOT NULL`` and ``CHECK`` violations.)
+
+        :param dict data: The fields of the new row
+        :param list conflict_columns: The columns of the primary key or
+                                      unique constraint to check
+        :raises IntegrityError: if the row violates another constraint
+        """
+        table = cls.__table__  # pylint: disable=no-member
+        if db.session.get_bind().dialect.name == 'postgresql':
+            statement = postgresql.insert(table).on_conflict_do_nothing(
+                index_elements=conflict_columns)
+        else:
+            statement = table.insert()
+        try:
+            result = db.session.execute(
+                statement.values(**data),
+                mapper=cls.__mapper__)  # pylint: disable=no-member
+        except IntegrityError:
+            db.session.rollback()
+            existing = cls.query.filter_by(
+                **{column: data[column] for column in conflict_columns}).first()
+            if existing is None:
+                raise
+            return None
+        if not result.rowcount:
+            return None
+        return result.inserted_primary_key
+
+    @classmethod
+    def estimated_count(cls):
+        """Return the number of rows in the model's table as estimated by the
+        database's statistics, or ``None`` if no estimate is available.
+
+        Estimates are read from ``pg_class`` on PostgreSQL and from
+        ``information_schema`` on MySQL. They are only as fresh as the last
+        ``ANALYZE`` of the table.
+
+        :rtype: int
+        """
+        table = cls.__table__  # pylint: disable=no-member
+        dialect = db.session.get_bind().dialect
+        if dialect.name == 'postgresql':
+            estimate = db.session.execute(
+                text('SELECT reltuples FROM pg_class WHERE oid = CAST(:name AS regclass)'),
+                {'name': dialect.identifier_preparer.format_table(table)}
+                ).scalar()
+        elif dialect.name == 'mysql':
+            estimate = db.session.execute(
+                text('SELECT TABLE_ROWS FROM information_schema.TABLES '
+                     'WHERE TABLE_SCHEMA = COALESCE(:schema, DATABASE()) '
+                     'AND TABLE_NAME = :name'),
+                {'schema': table.schema, 'name': table.name}).scalar()
+        else:
+            return None
+        if estimate is None or estimate < 0:
+            return None
+        return int(estimate)
+
+    @classmethod
+    def schema(cls):
+        """Return the :class:`sandman2.schema.Schema` describing the fields of
+        this model, building it if the model was not registered.
+
+        :rtype: :class:`sandman2.schema.Schema`
+        """
+        if '__schema__' not in cls.__dict__:
+            cls.__schema__ = Schema(cls)
+        return cls.__schema__
+
+    @classmethod
+    def serializer(cls):
+        """Return the :class:`sandman2.serializer.Serializer` used to convert
+        resources of this model to dictionaries, building it if the model was
+        not registered.
+
+        :rtype: :class:`sandman2.serializer.Serializer`
+        """
+        if '__serializer__' not in cls.__dict__:
+            cls.__serializer__ = Serializer(cls)
+        return cls.__serializer__
+
+    def to_dict(self, fields=None):
         """Return the resource as a dictionary.
 
+        :param list fields: The columns to include (default: all)
         :rtype: dict
         """
-        result_dict = {}
-        for column in self.__table__.columns.keys():  # pylint: disable=no-member
-            value = result_dict[column] = getattr(self, column, None)
-            if isinstance(value, Decimal):
-                result_dict[column] = float(result_dict[column])
-            elif isinstance(value, datetime.datetime):
-                result_dict[column] = value.isoformat()
-            elif isinstance(value, datetime.time):
-                result_dict[column] = value.strftime("%H:%M:%S")
-        return result_dict
+        return self.serializer().for_instances(fields)(self)
 
     def links(self):
         """Return a dictionary of links to related resources that should be
@@ -97,6 +241,10 @@ class Model(object):
 
         """
         link_dict = {'self': self.resource_uri()}
+        if self.__foreign_links__ is not None:
+            link_dict.update(self.foreign_key_links(
+                {column: getattr(self, column) for column, _ in self.__foreign_links__.values()}))
+            return link_dict
         for relationship in inspect(  # pylint: disable=maybe-no-member
                 self.__class__).relationships:
             if 'collection' not in relationship.key:
@@ -105,6 +253,43 @@ class Model(object):
                     link_dict[str(relationship.key)] = instance.resource_uri()
         return link_dict
 
+    @classmethod
+    def row_links(cls, row):
+        """Return the links :meth:`links` would return for the resource in
+        *row* (a result row of the model's table), computed from its foreign
+        keys rather than by loading related resources.
+
+        :rtype: dict
+        """
+        link_dict = {'self': cls.__url__ + '/' + str(row[cls.primary_key()])}
+        if cls.__foreign_links__ is not None:
+            link_dict.update(cls.foreign_key_links(row))
+            return link_dict
+        for relationship in inspect(cls).relationships:  # pylint: disable=maybe-no-member
+            if 'collection' in relationship.key or relationship.direction is not MANYTOONE:
+                continue
+            if len(relationship.local_remote_pairs) != 1:
+                continue
+            local, remote = relationship.local_remote_pairs[0]
+            related = relationship.mapper.class_
+            if remote.key != related.primary_key() or row[local.name] is None:
+                continue
+            link_dict[str(relationship.key)] = related.__url__ + '/' + str(row[local.name])
+        return link_dict
+
+    @classmethod
+    def foreign_key_links(cls, values):
+        """Return the links in :attr:`__foreign_links__` to the resources
+        referenced by the foreign key values in *values* (a mapping of column
+        names to values).
+
+        :rtype: dict
+        """
+        return {
+            name: url + '/' + str(values[column])
+            for name, (column, url) in cls.__foreign_links__.items()
+            if values[column] is not None}
+
     def resource_uri(self):
         """Return the URI to this specific resource.
 
@@ -131,14 +316,24 @@ class Model(object):
 
         :rtype: dict
         """
-
-        description = {}
-        for column in cls.__table__.columns:  # pylint: disable=no-member
-            column_description = str(column.type)
-            if not column.nullable:
-                column_description += ' (required)'
-            description[column.name] = column_description
-        return description
+        return dict(cls.schema().description)
 
 DeclarativeModel = declarative_base(cls=(db.Model, Model))
 AutomapModel = automap_base(DeclarativeModel)
+
+
+def map_table(table, foreign_links):
+    """Map *table* to a new class, without relationships (so that the tables
+    it references needn't be reflected), and return the class, or ``None``
+    if the table has no primary key.
+
+    :param table: The reflected :class:`sqlalchemy.Table`
+    :param dict foreign_links: The class's :attr:`Model.__foreign_links__`
+    """
+    if not table.primary_key.columns:
+        return None
+    base = declarative_base(cls=(db.Model, Model), metadata=table.metadata)
+    return type(str(table.name), (base,), {
+        '__table__': table,
+        '__foreign_links__': foreign_links,
+        })
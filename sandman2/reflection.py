@@ -0,0 +1,225 @@
+"""A snapshot of the database's reflected tables, stored in a file so that
+the application can start without reflecting the database.
+
+A snapshot is used only if the database's *fingerprint* (a cheap summary of
+its schema) hasn't changed since the snapshot was taken. The fingerprint is
+SQLite's ``schema_version``, which is incremented by every schema change, or
+a hash of the tables' columns, constraints and indexes read from the
+PostgreSQL or MySQL catalog in a few queries. Other databases are always
+reflected.
+"""
+
+# Standard library imports
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+# Third-party imports
+from sqlalchemy import MetaData, text
+
+#: The version of the snapshot file format
+SNAPSHOT_VERSION = 1
+
+#: The catalog queries whose results make up the fingerprint of a
+#: PostgreSQL schema
+POSTGRESQL_CATALOG = (
+    """SELECT c.relname, a.attname, format_type(a.atttypid, a.atttypmod),
+              a.attnotnull, pg_get_expr(d.adbin, d.adrelid)
+       FROM pg_attribute a
+       JOIN pg_class c ON c.oid = a.attrelid
+       JOIN pg_namespace n ON n.oid = c.relnamespace
+       LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+       WHERE n.nspname = COALESCE(:schema, current_schema())
+       AND c.relkind IN ('r', 'v', 'm', 'p', 'f')
+       AND a.attnum > 0 AND NOT a.attisdropped
+       ORDER BY c.relname, a.attnum""",
+    """SELECT c.relname, con.conname, pg_get_constraintdef(con.oid)
+       FROM pg_constraint con
+       JOIN pg_class c ON c.oid = con.conrelid
+       JOIN pg_namespace n ON n.oid = c.relnamespace
+       WHERE n.nspname = COALESCE(:schema, current_schema())
+       ORDER BY c.relname, con.conname""",
+    """SELECT tablename, indexname, indexdef
+       FROM pg_indexes
+       WHERE schemaname = COALESCE(:schema, current_schema())
+       ORDER BY tablename, indexname""",
+    )
+
+#: The catalog queries whose results make up the fingerprint of a MySQL
+#: schema
+MYSQL_CATALOG = (
+    """SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE,
+              COLUMN_DEFAULT, EXTRA
+       FROM information_schema.COLUMNS
+       WHERE TABLE_SCHEMA = COALESCE(:schema, DATABASE())
+       ORDER BY TABLE_NAME, ORDINAL_POSITION""",
+    """SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME, NON_UNIQUE
+       FROM information_schema.STATISTICS
+       WHERE TABLE_SCHEMA = COALESCE(:schema, DATABASE())
+       ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX""",
+    """SELECT TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME,
+              REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+       FROM information_schema.KEY_COLUMN_USAGE
+       WHERE TABLE_SCHEMA = COALESCE(:schema, DATABASE())
+       ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION""",
+    )
+
+
+def schema_fingerprint(connectable, schema=None):
+    """Return a string which changes whenever the tables of *schema* are
+    altered, or ``None`` if the database isn't supported.
+
+    :param connectable: The :class:`sqlalchemy.engine.Engine` (or
+                        connection) of the database
+    :param str schema: The schema to fingerprint (default: the default
+                       schema)
+    :rtype: str
+    """
+    name = connectable.dialect.name
+    if name == 'sqlite':
+        pragma = 'PRAGMA schema_version'
+        if schema:
+            pragma = 'PRAGMA "{}".schema_version'.format(schema.replace('"', '""'))
+        return str(connectable.execute(text(pragma)).scalar())
+    if name == 'postgresql':
+        queries = POSTGRESQL_CATALOG
+    elif name == 'mysql':
+        queries = MYSQL_CATALOG
+    else:
+        return None
+    digest = hashlib.sha1()
+    for query in queries:
+        for row in connectable.execute(text(query), schema=schema):
+            digest.update(repr(tuple(row)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ReflectionSnapshot(object):
+
+    """The snapshot, stored at a path, of the tables of a database (or of one
+    of its schemas).
+
+    The snapshot records the database's URL and the schema reflected, and is
+    ignored if either differs.
+    """
+
+    def __init__(self, path, engine, schema=None):
+        """Create the snapshot of *engine*'s database stored at *path*.
+
+        :param str path: The path of the snapshot file
+        :param engine: The :class:`sqlalchemy.engine.Engine` of the database
+        :param str schema: The schema reflected (default: the default schema)
+        """
+        self.path = path
+        self.engine = engine
+        self.schema = schema
+        #: The fingerprint of the schema when the snapshot was last loaded
+        #: or taken
+        self.fingerprint = None
+        self._thread = None
+
+    def load(self, fingerprint):
+        """Return the :class:`sqlalchemy.MetaData` stored in the snapshot,
+        or ``None`` if there is no snapshot or the database's schema has
+        changed since it was taken.
+
+        :param str fingerprint: The database's current fingerprint (see
+                                :func:`schema_fingerprint`)
+        """
+        if fingerprint is None:
+            return None
+        try:
+            with open(self.path, 'rb') as snapshot_file:
+                snapshot = pickle.load(snapshot_file)
+            if snapshot['version'] != SNAPSHOT_VERSION or snapshot['key'] != self._key(fingerprint):
+                return None
+        except Exception:  # pylint: disable=broad-except
+            return None  # a missing or unreadable snapshot is taken again
+        self.fingerprint = fingerprint
+        return snapshot['metadata']
+
+    def save(self, metadata, fingerprint):
+        """Store *metadata* in the snapshot, replacing the file atomically.
+
+        :param metadata: The reflected :class:`sqlalchemy.MetaData`
+        :param str fingerprint: The fingerprint of the schema *metadata* was
+                                reflected from
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as snapshot_file:
+                pickle.dump({
+                    'version': SNAPSHOT_VERSION,
+                    'key': self._key(fingerprint),
+                    'metadata': metadata,
+                    }, snapshot_file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+        self.fingerprint = fingerprint
+
+    def _key(self, fingerprint):
+        """Return what identifies the database state the snapshot is valid
+        for."""
+        return repr(self.engine.url), self.schema, fingerprint
+
+    def reflect(self):
+        """Reflect the database's tables and store them in the snapshot (if
+        the database can be fingerprinted).
+
+        :rtype: :class:`sqlalchemy.MetaData`
+        """
+        with self.engine.connect() as connection:
+            fingerprint = schema_fingerprint(connection, self.schema)
+            metadata = MetaData()
+            metadata.reflect(connection, schema=self.schema)
+        if fingerprint is not None:
+            self.save(metadata, fingerprint)
+        return metadata
+
+    def metadata(self):
+        """Return the database's tables, from the snapshot if it is current
+        and otherwise by reflecting them (and updating the snapshot).
+
+        :rtype: :class:`sqlalchemy.MetaData`
+        """
+        metadata = self.load(schema_fingerprint(self.engine, self.schema))
+        if metadata is None:
+            metadata = self.reflect()
+        return metadata
+
+    def refresh(self):
+        """Take a new snapshot if the database's schema has changed since the
+        last one. Returns ``True`` if a snapshot was taken.
+
+        :rtype: bool
+        """
+        fingerprint = schema_fingerprint(self.engine, self.schema)
+        if fingerprint is None or fingerprint == self.fingerprint:
+            return False
+        self.reflect()
+        return True
+
+    def refresh_periodically(self, interval):
+        """Check for schema changes every *interval* seconds in a background
+        thread, keeping the snapshot current for the next start.
+
+        The running application keeps the tables it started with.
+
+        :param float interval: The number of seconds between checks
+        """
+        def run():
+            """Refresh the snapshot until the process exits."""
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception:  # pylint: disable=broad-except
+                    pass  # the database may be briefly unavailable
+        self._thread = threading.Thread(target=run, name='sandman2-reflection', daemon=True)
+        self._thread.start()
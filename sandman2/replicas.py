@@ -0,0 +1,137 @@
+"""Routing of read-only requests to replicas of the database."""
+
+# Standard library imports
+import itertools
+import threading
+import time
+
+# Third-party imports
+from sqlalchemy import event, select
+
+#: The key of the engine a session reads from, in ``Session.info``.
+REPLICA_KEY = 'sandman2_replica'
+
+#: The header which, if sent with a ``GET`` request, makes it read from the
+#: primary database (so that it sees the client's own writes).
+DEFAULT_PRIMARY_HEADER = 'X-Read-Your-Writes'
+
+
+class ReplicaSet(object):
+
+    """Chooses the replica each read-only request is executed on.
+
+    Replicas are chosen in turn (``round-robin``) or by fewest connections
+    in use (``least-connections``). A replica whose connections fail is
+    skipped until it answers a health check, made at most every
+    *check_interval* seconds. If no replica is available, ``None`` is
+    chosen, and requests read from the primary database.
+    """
+
+    def __init__(self, engines, strategy='round-robin', check_interval=30):
+        """Create a set of the replicas accessed through *engines*.
+
+        :param list engines: The :class:`sqlalchemy.engine.Engine` of each
+                             replica
+        :param str strategy: ``round-robin`` or ``least-connections``
+        :param float check_interval: The number of seconds between health
+                                     checks of a failed replica
+        """
+        if strategy not in ('round-robin', 'least-connections'):
+            raise ValueError('Unknown replica strategy [{}]'.format(strategy))
+        self.engines = list(engines)
+        self.strategy = strategy
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._turns = itertools.cycle(range(len(self.engines)))
+        self._connections = dict.fromkeys(self.engines, 0)
+        self._failed = {}
+        for engine in self.engines:
+            self._watch(engine)
+
+    def _watch(self, engine):
+        """Listen to *engine*'s events to count its connections in use and
+        detect its failures."""
+
+        @event.listens_for(engine, 'checkout')
+        def checkout(*args):  # pylint: disable=unused-variable,unused-argument
+            """Count a connection checked out."""
+            with self._lock:
+                self._connections[engine] += 1
+
+        @event.listens_for(engine, 'checkin')
+        def checkin(*args):  # pylint: disable=unused-variable,unused-argument
+            """Count a connection returned."""
+            with self._lock:
+                self._connections[engine] = max(self._connections[engine] - 1, 0)
+
+        @event.listens_for(engine, 'handle_error')
+        def handle_error(context):  # pylint: disable=unused-variable
+            """Mark the replica as failed if it can't be reached."""
+            if context.is_disconnect or context.connection is None:
+                self.mark_failed(engine)
+
+    def mark_failed(self, engine):
+        """Stop choosing *engine* until it passes a health check."""
+        with self._lock:
+            self._failed[engine] = time.monotonic()
+
+    def failed(self, engine):
+        """Return ``True`` if *engine* is marked as failed."""
+        with self._lock:
+            return engine in self._failed
+
+    def _available(self, engine):
+        """Return ``True`` if *engine* hasn't failed, or has recovered."""
+        with self._lock:
+            failed_at = self._failed.get(engine)
+            if failed_at is None:
+                return True
+            if time.monotonic() - failed_at < self.check_interval:
+                return False
+            # only one request checks the replica at a time
+            self._failed[engine] = time.monotonic()
+        if self.check(engine):
+            with self._lock:
+                self._failed.pop(engine, None)
+            return True
+        return False
+
+    @staticmethod
+    def check(engine):
+        """Return ``True`` if *engine*'s database answers a query."""
+        try:
+            with engine.connect() as connection:
+                connection.scalar(select([1]))
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+    def choose(self):
+        """Return the engine of the replica the next read-only request should
+        use, or ``None`` if none is available.
+
+        :rtype: :class:`sqlalchemy.engine.Engine`
+        """
+        if self.strategy == 'least-connections':
+            with self._lock:
+                candidates = sorted(self.engines, key=self._connections.get)
+        else:
+            with self._lock:
+                start = next(self._turns)
+            candidates = self.engines[start:] + self.engines[:start]
+        for engine in candidates:
+            if self._available(engine):
+                return engine
+        return None
+
+    def stats(self):
+        """Return the state of each replica.
+
+        :rtype: list
+        """
+        with self._lock:
+            return [{
+                'url': repr(engine.url),
+                'connections': self._connections[engine],
+                'healthy': engine not in self._failed,
+                } for engine in self.engines]
@@ -0,0 +1,163 @@
+"""Descriptions of the fields of a resource, used to validate requests."""
+
+# Standard library imports
+import datetime
+from decimal import Decimal, InvalidOperation
+import re
+
+#: The ISO 8601 formats accepted for date and time fields (``fromisoformat``
+#: only exists from Python 3.7)
+DATE_FORMATS = ('%Y-%m-%d',)
+TIME_FORMATS = ('%H:%M:%S.%f', '%H:%M:%S', '%H:%M')
+DATETIME_FORMATS = tuple(
+    DATE_FORMATS[0] + separator + time_format + offset
+    for separator in ('T', ' ')
+    for time_format in TIME_FORMATS
+    for offset in ('', '%z')) + DATE_FORMATS
+
+#: A UTC offset written with a colon, which ``%z`` only accepts from Python
+#: 3.7
+OFFSET_COLON = re.compile(r'([+-]\d\d):(\d\d)$')
+
+
+def _to_bool(value):
+    """Return the boolean represented by the string *value*."""
+    try:
+        return {'true': True, '1': True, 'false': False, '0': False}[value.lower()]
+    except KeyError:
+        raise ValueError('Invalid boolean [{}]'.format(value))
+
+
+def _to_decimal(value):
+    """Return the decimal represented by the string *value*."""
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValueError('Invalid decimal [{}]'.format(value))
+
+
+def _strptime_coercer(formats, convert):
+    """Return a coercer parsing strings in any of *formats*, and returning
+    the parsed :class:`datetime.datetime` converted by *convert*."""
+    def coerce(value):
+        """Return the value represented by the string *value*."""
+        value = OFFSET_COLON.sub(r'\1\2', value)
+        for date_format in formats:
+            try:
+                return convert(datetime.datetime.strptime(value, date_format))
+            except ValueError:
+                pass
+        raise ValueError('Invalid date or time [{}]'.format(value))
+    return coerce
+
+
+_to_datetime = _strptime_coercer(DATETIME_FORMATS, lambda parsed: parsed)
+_to_date = _strptime_coercer(DATE_FORMATS, datetime.datetime.date)
+_to_time = _strptime_coercer(TIME_FORMATS, datetime.datetime.time)
+
+#: The coercers whose values may compare differently from the string given:
+#: SQLite stores dates and times as text, in a format of the application's
+#: choosing, so a parsed date bound in SQLAlchemy's format needn't match
+TEXT_COMPARED_COERCERS = frozenset((_to_datetime, _to_date, _to_time))
+
+
+def column_coercer(column):
+    """Return the function used to convert strings (such as URL parameters)
+    into values of *column*'s type, or ``None`` if strings can be used as-is.
+
+    Coercers raise :class:`ValueError` if a string can't be converted.
+
+    :param column: :class:`sqlalchemy.Column` to return the coercer for
+    """
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return None
+    if issubclass(python_type, bool):
+        return _to_bool
+    elif issubclass(python_type, Decimal):
+        return _to_decimal
+    elif issubclass(python_type, (int, float)):
+        return python_type
+    elif issubclass(python_type, datetime.datetime):
+        return _to_datetime
+    elif issubclass(python_type, datetime.date):
+        return _to_date
+    elif issubclass(python_type, datetime.time):
+        return _to_time
+    return None
+
+
+class Schema(object):
+
+    """Describes the fields of a :class:`sandman2.model.Model`: which are
+    required to create a resource, which are optional, their database types
+    and how to convert strings into values of each.
+
+    The description is computed once, when the schema is built, so
+    validating a request doesn't need to inspect the model's table.
+    """
+
+    def __init__(self, model):
+        """Build the schema of *model*.
+
+        :param model: The :class:`sandman2.model.Model` class to describe
+        """
+        table = model.__table__
+        #: The names of the columns required to create a resource (in table
+        #: order)
+        self.required = []
+        #: The names of the nullable columns (in table order)
+        self.optional = []
+        #: A field->data type dictionary, as returned by ``/meta``
+        self.description = {}
+        #: A field->coercer dictionary (see :func:`column_coercer`)
+        self.coercers = {}
+        #: A field->coercer dictionary of the coercers of filter values,
+        #: without those that could change the result of a comparison (see
+        #: :data:`TEXT_COMPARED_COERCERS`)
+        self.filter_coercers = {}
+        for column in table.columns:
+            is_autoincrement = 'int' in str(column.type).lower() and column.autoincrement
+            if (not column.nullable and not column.primary_key) or (column.primary_key and not is_autoincrement):
+                self.required.append(column.name)
+            if column.nullable:
+                self.optional.append(column.name)
+            column_description = str(column.type)
+            if not column.nullable:
+                column_description += ' (required)'
+            self.description[column.name] = column_description
+            coercer = self.coercers[column.name] = column_coercer(column)
+            if coercer not in TEXT_COMPARED_COERCERS:
+                self.filter_coercers[column.name] = coercer
+        #: The set of required fields
+        self.required_fields = frozenset(self.required)
+        #: The set of fields that may be sent when creating a resource
+        self.allowed_fields = frozenset(self.required + self.optional)
+        #: The set of all fields
+        self.fields = frozenset(self.description)
+
+    def validation_error(self, data):
+        """Return the message describing why *data* is not a valid new
+        resource, or ``None`` if it is valid.
+
+        :param dict data: The fields of the resource
+        :rtype: str
+        """
+        for key in data:
+            if key not in self.allowed_fields:
+                return 'Unknown field [{}]'.format(key)
+        missing = self.required_fields.difference(data)
+        if missing:
+            return 'The following required fields are missing: ' + ', '.join(missing)
+        return None
+
+    def coerce(self, field, value):
+        """Return the string *value* converted to the type of *field*.
+
+        :raises ValueError: if *value* isn't a valid value of the field's type
+        """
+        coercer = self.coercers.get(field)
+        if coercer is None:
+            return value
+        return coercer(value)
@@ -0,0 +1,145 @@
+"""Conversion of resources into JSON-serializable dictionaries."""
+
+# Standard library imports
+import datetime
+from decimal import Decimal
+from operator import attrgetter, itemgetter
+
+
+def _convert_value(value):
+    """Return *value* converted to a type that can be serialized as JSON."""
+    if isinstance(value, Decimal):
+        return float(value)
+    elif isinstance(value, datetime.datetime):
+        return value.isoformat()
+    elif isinstance(value, datetime.time):
+        return value.strftime("%H:%M:%S")
+    return value
+
+
+def _format_time(value):
+    """Return the ``datetime.time`` *value* as a string."""
+    return value.strftime("%H:%M:%S")
+
+
+def column_converter(column):
+    """Return the function used to convert (non-``NULL``) values of *column*
+    into JSON-serializable ones, or ``None`` if values can be used as-is.
+
+    The converter is chosen once, based on the column's type, rather than by
+    inspecting each value.
+
+    :param column: :class:`sqlalchemy.Column` to return the converter for
+    """
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return _convert_value
+    if issubclass(python_type, Decimal):
+        return float
+    elif issubclass(python_type, datetime.datetime):
+        return datetime.datetime.isoformat
+    elif issubclass(python_type, datetime.time):
+        return _format_time
+    elif issubclass(python_type, (bool, int, float, str, bytes, datetime.date)):
+        return None
+    return _convert_value
+
+
+def _getter(getter_class, keys):
+    """Return a function fetching *keys* from an object as a tuple, using
+    *getter_class* (:func:`operator.attrgetter` or
+    :func:`operator.itemgetter`)."""
+    if len(keys) == 1:
+        get = getter_class(keys[0])
+        return lambda obj: (get(obj),)
+    return getter_class(*keys)
+
+
+class Serializer(object):
+
+    """Converts instances of a :class:`sandman2.model.Model` (or rows of its
+    table returned by a Core ``SELECT``) into dictionaries.
+
+    The columns of the model and the converter needed for each are determined
+    once, when the serializer is built. The functions returned for each set of
+    fields are cached, so serializing a resource amounts to fetching its
+    attributes and converting only those values whose column type requires it.
+    """
+
+    def __init__(self, model):
+        """Build a serializer for *model*.
+
+        :param model: The :class:`sandman2.model.Model` class to serialize
+        """
+        table = model.__table__
+        mapper = getattr(model, '__mapper__', None)
+        self.columns = table.columns.keys()
+        self._attributes = {}
+        self._converters = {}
+        for name in self.columns:
+            column = table.columns[name]
+            attribute = name
+            if mapper is not None:
+                try:
+                    attribute = mapper.get_property_by_column(column).key
+                except Exception:  # pylint: disable=broad-except
+                    pass
+            self._attributes[name] = attribute
+            self._converters[name] = column_converter(column)
+        self._instance_serializers = {}
+        self._row_serializers = {}
+
+    def for_instances(self, fields=None):
+        """Return a function converting a model instance into a dictionary.
+
+        :param list fields: The columns to include (default: all)
+        :rtype: function
+        """
+        key = tuple(fields or ())
+        if key not in self._instance_serializers:
+            names = list(fields or self.columns)
+            attributes = [self._attributes.get(name, name) for name in names]
+            if any('.' in attribute for attribute in attributes):
+                getter = lambda obj: tuple(getattr(obj, a, None) for a in attributes)
+            else:
+                getter = _getter(attrgetter, attributes)
+            self._instance_serializers[key] = self._build(names, getter)
+        return self._instance_serializers[key]
+
+    def for_rows(self, fields=None, convert=True):
+        """Return a function converting a result row of the model's table into
+        a dictionary.
+
+        :param list fields: The columns to include (default: all)
+        :param bool convert: Convert values to JSON-serializable types; values
+                             may be left as they are if the dictionary is
+                             encoded by :mod:`sandman2.encoder`
+        :rtype: function
+        """
+        key = (tuple(fields or ()), convert)
+        if key not in self._row_serializers:
+            names = list(fields or self.columns)
+            getter = _getter(itemgetter, names)
+            if convert:
+                self._row_serializers[key] = self._build(names, getter)
+            else:
+                self._row_serializers[key] = lambda row: dict(zip(names, getter(row)))
+        return self._row_serializers[key]
+
+    def _build(self, names, getter):
+        """Return a function building a dictionary of *names* from the values
+        returned by *getter*, converting values where necessary."""
+        converters = [
+            (name, self._converters[name]) for name in names
+            if self._converters.get(name) is not None]
+
+        def serialize(obj):
+            """Return *obj* as a dictionary."""
+            result_dict = dict(zip(names, getter(obj)))
+            for name, convert in converters:
+                value = result_dict[name]
+                if value is not None:
+                    result_dict[name] = convert(value)
+            return result_dict
+        return serialize
@@ -0,0 +1,164 @@
+"""Servers for running a sandman2 application outside of Flask's development
+server.
+
+In production, the application is served by gunicorn worker processes,
+forked from a process which has already created (and reflected) it.
+
+The application is synchronous (Flask and SQLAlchemy 1.3 have no asyncio
+support), so the *async* mode runs it in greenlets: gevent replaces the
+standard library's blocking socket operations with cooperative ones, and a
+request waiting on the database yields to the others rather than holding a
+thread.
+"""
+
+# Application imports
+from sandman2.model import db
+from sandman2.versions import SharedTableVersions
+
+
+def _psycopg2_wait_callback(connection, timeout=None):
+    """Wait for *connection*'s pending operation without blocking other
+    greenlets."""
+    # pylint: disable=import-error
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import extensions, OperationalError
+    while True:
+        state = connection.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(connection.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(connection.fileno(), timeout=timeout)
+        else:
+            raise OperationalError('Bad result from poll: {}'.format(state))
+
+
+def patch_for_greenlets():
+    """Make blocking I/O cooperative, so that requests can be served
+    concurrently by greenlets.
+
+    Must be called before the application (and its database engines) is
+    created. Drivers written in Python (such as PyMySQL) use the patched
+    sockets; psycopg2 is made to wait through gevent. Drivers blocking in C
+    (such as SQLite's) still block the whole process.
+    """
+    from gevent import monkey  # pylint: disable=import-error
+    monkey.patch_all()
+    try:
+        from psycopg2 import extensions  # pylint: disable=import-error
+    except ImportError:
+        return
+    extensions.set_wait_callback(_psycopg2_wait_callback)
+
+
+def serve_async(app, host, port, connections=1000):
+    """Serve *app* on *host* and *port* from a single process, handling each
+    request in a greenlet.
+
+    :param app: The :class:`flask.Flask` application to serve
+    :param str host: The address to listen on
+    :param int port: The port to listen on
+    :param int connections: The maximum number of requests handled at once
+    """
+    # pylint: disable=import-error
+    from gevent.pool import Pool
+    from gevent.pywsgi import WSGIServer
+    server = WSGIServer((host, port), app, spawn=Pool(connections))
+    server.serve_forever()
+
+
+def dispose_engines(app):
+    """Close the database connections *app* has open, so that processes
+    forked from this one open their own rather than sharing its sockets.
+
+    :param app: The :class:`flask.Flask` application
+    """
+    with app.app_context():
+        db.engine.dispose()
+    if 'sandman2_replicas' in app.extensions:
+        for engine in app.extensions['sandman2_replicas'].engines:
+            engine.dispose()
+
+
+def check_workers(app, workers):
+    """Raise :class:`ValueError` if *app* can't be served by *workers*
+    processes.
+
+    Table versions and cached responses are held in each process's memory
+    unless they are shared through Redis (see
+    :func:`sandman2.app.use_shared_cache`): a process wouldn't see the writes
+    made by the others, and would serve stale cached responses or answer
+    conditional requests for changed resources with ``304 Not Modified``.
+
+    :param app: The :class:`flask.Flask` application to serve
+    :param int workers: The number of worker processes
+    """
+    if workers <= 1 or isinstance(app.extensions.get('sandman2_versions'), SharedTableVersions):
+        return
+    if 'sandman2_cache' in app.extensions or app.config.get('SANDMAN2_ETAG') == 'version':
+        raise ValueError(
+            'A response cache or version ETags can only be used by several workers '
+            'if they are shared through Redis (--cache-url)')
+
+
+def serve_workers(
+        app,
+        host,
+        port,
+        workers=1,
+        threads=1,
+        keep_alive=2,
+        backlog=2048,
+        use_async=False,
+        connections=1000):
+    """Serve *app* on *host* and *port* from gunicorn worker processes.
+
+    The workers are forked from this process after *app* is created, so they
+    share its reflected models (copy-on-write) instead of each reflecting the
+    database.
+
+    :param app: The :class:`flask.Flask` application to serve
+    :param str host: The address to listen on
+    :param int port: The port to listen on
+    :param int workers: The number of worker processes
+    :param int threads: The number of threads handling requests in each
+                        worker
+    :param int keep_alive: The number of seconds to wait for the next
+                           request on a keep-alive connection
+    :param int backlog: The maximum number of connections waiting to be
+                        accepted
+    :param bool use_async: Handle requests in greenlets (see
+                           :func:`patch_for_greenlets`) rather than threads
+    :param int connections: The maximum number of requests each worker
+                            handles at once with *use_async*
+    :raises ValueError: if *app* can't be served by several processes (see
+                        :func:`check_workers`)
+    """
+    check_workers(app, workers)
+    from gunicorn.app.base import BaseApplication  # pylint: disable=import-error
+    options = {
+        'bind': '{}:{}'.format(host, port),
+        'workers': workers,
+        'threads': threads,
+        'keepalive': keep_alive,
+        'backlog': backlog,
+        'preload_app': True,
+        }
+    if use_async:
+        options['worker_class'] = 'gevent'
+        options['worker_connections'] = connections
+
+    class Application(BaseApplication):  # pylint: disable=abstract-method
+
+        """Serves the already created application."""
+
+        def load_config(self):
+            for name, value in options.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            return app
+
+    dispose_engines(app)
+    Application().run()
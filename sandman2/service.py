@@ -1,16 +1,57 @@
 """Automatically generated REST API services from SQLAlchemy
 ORM models or a database introspection."""
 
+# Standard library imports
+import base64
+import csv
+import io
+import json
+from urllib.parse import urlencode
+
 # Third-party imports
-from flask import request, make_response
-import flask
+from flask import current_app, request, make_response, stream_with_context, Response
 from flask.views import MethodView
-from sqlalchemy import asc, desc
+from sqlalchemy import and_, asc, bindparam, desc, or_, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
 
 # Application imports
-from sandman2.exception import NotFoundException, BadRequestException
-from sandman2.model import db
-from sandman2.decorators import etag, validate_fields
+from sandman2 import encoder
+from sandman2 import filters as url_filters
+from sandman2.exception import (
+    BadRequestException,
+    ConflictException,
+    NotFoundException,
+    )
+from sandman2.model import db, Model
+from sandman2.versions import mark_written
+from sandman2.decorators import (
+    cached,
+    etag,
+    read_from_replica,
+    request_data,
+    validate_fields,
+    )
+
+
+#: The media type of newline-delimited JSON collections.
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+#: Link names which are sent with their own relation type rather than as
+#: ``related`` links.
+PAGINATION_RELATIONS = ('first', 'prev', 'next', 'last')
+
+#: The URL parameter listing the primary keys of the resources to GET (named
+#: so as not to be taken for a filter on a column)
+BATCH_GET_PARAMETER = '_ids'
+
+#: Databases which sort ``NULL`` before other values in ascending order (the
+#: others, such as PostgreSQL, sort it after them).
+NULLS_FIRST_DIALECTS = frozenset(('sqlite', 'mysql', 'mssql'))
+
+#: Databases supporting row value comparisons such as ``(a, b) > (1, 2)``
+#: (SQLite only from 3.15, and SQL Server not at all)
+ROW_VALUE_DIALECTS = frozenset(('postgresql', 'mysql'))
 
 
 def add_link_headers(response, links):
@@ -23,20 +64,23 @@ def add_link_headers(response, links):
     :rtype :class:`flask.Response` :
     """
     link_string = '<{}>; rel=self'.format(links['self'])
-    for link in links.values():
-        link_string += ', <{}>; rel=related'.format(link)
+    for name, link in links.items():
+        relation = name if name in PAGINATION_RELATIONS else 'related'
+        link_string += ', <{}>; rel={}'.format(link, relation)
     response.headers['Link'] = link_string
     return response
 
 
-def jsonify(resource):
+def jsonify(resource, fields=None):
     """Return a Flask ``Response`` object containing a
     JSON representation of *resource*.
 
     :param resource: The resource to act as the basis of the response
+    :param list fields: The fields to include in the representation (default:
+                        all)
     """
 
-    response = flask.jsonify(resource.to_dict())
+    response = encoder.jsonify(resource.to_dict(fields) if fields else resource.to_dict())
     response = add_link_headers(response, resource.links())
     return response
 
@@ -66,11 +110,27 @@ class Service(MethodView):
     #: returned.
     __json_collection_name__ = 'resources'
 
-    def delete(self, resource_id):
+    #: The number of rows fetched from the database (and written to the
+    #: client) at a time when a collection is streamed.
+    __stream_chunk_size__ = 1000
+
+    #: The maximum number of primary keys sent in each ``IN`` clause when
+    #: many resources are requested by primary key.
+    __batch_get_chunk_size__ = 500
+
+    def delete(self, resource_id=None):
         """Return an HTTP response object resulting from a HTTP DELETE call.
 
+        If *resource_id* is not provided, every resource matching the filters
+        in the URL parameters is deleted with a single statement, and the
+        number deleted is returned.
+
         :param resource_id: The value of the resource's primary key
         """
+        if resource_id is None:
+            return self._bulk_change(
+                lambda query: query.delete(synchronize_session=False))
+
         resource = self._resource(resource_id)
         error_message = is_valid_method(self.__model__, resource)
         if error_message:
@@ -80,6 +140,8 @@ class Service(MethodView):
         return self._no_content_response()
 
     @etag
+    @cached
+    @read_from_replica
     def get(self, resource_id=None):
         """Return an HTTP response object resulting from an HTTP GET call.
 
@@ -96,10 +158,26 @@ class Service(MethodView):
             if error_message:
                 raise BadRequestException(error_message)
 
-            if 'export' in request.args: 
-                return self._export(self._all_resources())
+            if BATCH_GET_PARAMETER in request.args:
+                return self._batch_get()
+
+            if 'export' in request.args:
+                return self._export(*self._collection_query())
+
+            if 'cursor' in request.args:
+                return self._cursor_page(*self._collection_query())
+
+            if 'page' in request.args:
+                return self._page(*self._collection_query())
+
+            if request.accept_mimetypes.best_match(
+                    ['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+                return self._stream(*self._collection_query(), ndjson=True)
+
+            if current_app.config.get('SANDMAN2_STREAM_COLLECTIONS'):
+                return self._stream(*self._collection_query())
 
-            return flask.jsonify({
+            return encoder.jsonify({
                 self.__json_collection_name__: self._all_resources()
                 })
         else:
@@ -107,16 +185,31 @@ class Service(MethodView):
             error_message = is_valid_method(self.__model__, resource)
             if error_message:
                 raise BadRequestException(error_message)
-            return jsonify(resource)
+            return jsonify(resource, self._fields())
 
-    def patch(self, resource_id):
+    def patch(self, resource_id=None):
         """Return an HTTP response object resulting from an HTTP PATCH call.
 
+        If *resource_id* is not provided, every resource matching the filters
+        in the URL parameters is updated with a single statement, and the
+        number updated is returned.
+
         :returns: ``HTTP 200`` if the resource already exists
         :returns: ``HTTP 400`` if the request is malformed
         :returns: ``HTTP 404`` if the resource is not found
         :param resource_id: The value of the resource's primary key
         """
+        if resource_id is None:
+            values = self._update_values()
+            return self._bulk_change(
+                lambda query: query.update(values, synchronize_session=False))
+
+        if self._updates_directly():
+            row = self._update(resource_id, self._update_values())
+            if row is None:
+                raise NotFoundException()
+            return self._row_response(row)
+
         resource = self._resource(resource_id)
         error_message = is_valid_method(self.__model__, resource)
         if error_message:
@@ -133,18 +226,50 @@ class Service(MethodView):
         """Return the JSON representation of a new resource created through
         an HTTP POST call.
 
+        If the primary key or the columns of a unique constraint are sent, the
+        resource is inserted with a single statement that does nothing if it
+        conflicts with an existing one. Otherwise, an existing resource with
+        the same fields is searched for first, unless the
+        ``SANDMAN2_POST_PROBE`` setting is disabled.
+
+        If a list of resources is sent (as a JSON array or as newline-delimited
+        JSON), they are created together; see :meth:`_bulk_create`.
+
         :returns: ``HTTP 201`` if a resource is properly created
         :returns: ``HTTP 204`` if the resource already exists
         :returns: ``HTTP 400`` if the request is malformed or missing data
         """
-        resource = self.__model__.query.filter_by(**request.json).first()
+        data = request_data()
+        if isinstance(data, list):
+            return self._bulk_create(data)
+
+        conflict_columns = self.__model__.conflict_columns(data)
+        if conflict_columns and not hasattr(self.__model__, 'is_valid_post'):
+            try:
+                primary_key = self.__model__.insert_unless_conflicting(
+                    data, conflict_columns)
+            except IntegrityError as exception:
+                raise ConflictException(str(exception.orig))
+            if primary_key is None:
+                return self._no_content_response()
+            mark_written(db.session(), self.__model__.__table__)
+            db.session().commit()
+            return self._created_response(self.__model__.query.get(primary_key))
+
+        if conflict_columns:
+            resource = self.__model__.query.filter_by(
+                **{column: data[column] for column in conflict_columns}).first()
+        elif current_app.config.get('SANDMAN2_POST_PROBE', True):
+            resource = self.__model__.query.filter_by(**data).first()
+        else:
+            resource = None
         if resource:
             error_message = is_valid_method(self.__model__, resource)
             if error_message:
                 raise BadRequestException(error_message)
             return self._no_content_response()
 
-        resource = self.__model__(**request.json)  # pylint: disable=not-callable
+        resource = self.__model__(**data)  # pylint: disable=not-callable
         error_message = is_valid_method(self.__model__, resource)
         if error_message:
             raise BadRequestException(error_message)
@@ -152,6 +277,92 @@ class Service(MethodView):
         db.session().commit()
         return self._created_response(resource)
 
+    def _bulk_create(self, items):
+        """Return a response describing the creation of each resource in
+        *items*.
+
+        Every item is validated, then all valid items are inserted in a single
+        transaction, in order, with multi-row ``INSERT`` statements of up to
+        ``SANDMAN2_BULK_BATCH_SIZE`` consecutive items sending the same fields.
+        No check is made for existing resources. The response contains a
+        status for each item, in order, with the primary key and URL of each
+        resource created.
+
+        Generated primary keys are returned by the ``INSERT`` statements on
+        databases supporting ``INSERT ... RETURNING``; elsewhere, items without
+        their primary key are inserted one at a time (in the same
+        transaction) to learn their keys.
+
+        :returns: ``HTTP 201`` if all resources are created
+        :returns: ``HTTP 207`` if only some resources are valid (and created)
+        :returns: ``HTTP 400`` if no resource is valid
+        :returns: ``HTTP 409`` if the resources conflict with existing ones, in
+                  which case none is created
+        :param list items: The resources to create
+        """
+        schema = self.__model__.schema()
+        validate_hook = hasattr(self.__model__, 'is_valid_post')
+        statuses = []
+        # runs of consecutive valid items sending the same fields, as
+        # (fields, item indexes) pairs
+        runs = []
+        for index, item in enumerate(items):
+            error_message = schema.validation_error(item)
+            if not error_message and validate_hook:
+                error_message = is_valid_method(
+                    self.__model__, self.__model__(**item))  # pylint: disable=not-callable
+            if error_message:
+                statuses.append({'status': 400, 'message': error_message})
+                continue
+            statuses.append({'status': 201})
+            if runs and runs[-1][0] == frozenset(item):
+                runs[-1][1].append(index)
+            else:
+                runs.append((frozenset(item), [index]))
+
+        created = sum(len(indexes) for _, indexes in runs)
+        if created:
+            table = self.__model__.__table__
+            mapper = self.__model__.__mapper__
+            key = table.columns[self.__model__.primary_key()]
+            batch_size = current_app.config.get('SANDMAN2_BULK_BATCH_SIZE', 1000)
+            session = db.session()
+            dialect = session.get_bind(mapper).dialect
+            returning = dialect.implicit_returning and dialect.supports_multivalues_insert
+            try:
+                for fields, indexes in runs:
+                    for start in range(0, len(indexes), batch_size):
+                        batch = indexes[start:start + batch_size]
+                        rows = [items[index] for index in batch]
+                        if key.name in fields:
+                            session.execute(table.insert(), rows, mapper=mapper)
+                            keys = [row[key.name] for row in rows]
+                        elif returning:
+                            keys = [inserted[0] for inserted in session.execute(
+                                table.insert().values(rows).returning(key), mapper=mapper)]
+                        else:
+                            keys = [
+                                session.execute(
+                                    table.insert(), row, mapper=mapper).inserted_primary_key[0]
+                                for row in rows]
+                        for index, value in zip(batch, keys):
+                            statuses[index][key.name] = value
+                            statuses[index]['self'] = '{}/{}'.format(self.__model__.__url__, value)
+                mark_written(session, table)
+                session.commit()
+            except IntegrityError as exception:
+                session.rollback()
+                raise ConflictException(str(exception.orig))
+
+        response = encoder.jsonify({self.__json_collection_name__: statuses})
+        if created == len(items):
+            response.status_code = 201
+        elif created:
+            response.status_code = 207
+        else:
+            response.status_code = 400
+        return response
+
     def put(self, resource_id):
         """Return the JSON representation of a new resource created or updated
         through an HTTP PUT call.
@@ -165,7 +376,13 @@ class Service(MethodView):
         :returns: ``HTTP 200`` if a resource is updated
         :returns: ``HTTP 400`` if the request is malformed or missing data
         """
-        resource = self.__model__.query.get(resource_id)
+        if self._updates_directly():
+            row = self._update(resource_id, self._update_values())
+            if row is not None:
+                return self._row_response(row)
+            resource = None
+        else:
+            resource = self.__model__.query.get(resource_id)
         if resource:
             error_message = is_valid_method(self.__model__, resource)
             if error_message:
@@ -183,10 +400,74 @@ class Service(MethodView):
         db.session().commit()
         return self._created_response(resource)
 
+    def _updates_directly(self):
+        """Return ``True`` if a single resource can be updated with an
+        ``UPDATE`` statement, without loading it first: that is, if the model
+        has no validation hook for the current request's method and uses the
+        default :meth:`sandman2.model.Model.to_dict`.
+
+        :rtype: bool
+        """
+        return (
+            self.__model__.to_dict is Model.to_dict and
+            not hasattr(self.__model__, 'is_valid_{}'.format(request.method.lower())))
+
+    def _update_values(self):
+        """Return the fields to be updated sent with the current request.
+
+        :rtype: dict
+        """
+        values = request.json
+        if not values or not isinstance(values, dict):
+            raise BadRequestException('No JSON data received')
+        fields = self.__model__.schema().fields
+        for key in values:
+            if key not in fields:
+                raise BadRequestException('Unknown field [{}]'.format(key))
+        return values
+
+    def _update(self, resource_id, values):
+        """Update the resource with the given *resource_id* with a single
+        ``UPDATE`` statement and return its new result row, or ``None`` if no
+        such resource exists.
+
+        Where the database supports ``UPDATE ... RETURNING``, the row is
+        returned by the update itself; elsewhere it is selected afterwards.
+
+        :param resource_id: The value of the resource's primary key
+        :param dict values: The fields to update
+        """
+        table = self.__model__.__table__
+        mapper = self.__model__.__mapper__
+        key = table.columns[self.__model__.primary_key()]
+        statement = table.update().where(key == resource_id).values(values)
+        session = db.session()
+        if session.get_bind(mapper).dialect.implicit_returning:
+            row = session.execute(
+                statement.returning(*table.columns), mapper=mapper).first()
+        elif session.execute(statement, mapper=mapper).rowcount:
+            row = session.execute(
+                table.select().where(key == values.get(key.name, resource_id)),
+                mapper=mapper).first()
+        else:
+            row = None
+        if row is None:
+            return None
+        mark_written(session, table)
+        session.commit()
+        return row
+
+    def _row_response(self, row):
+        """Return a response containing the resource in the result row
+        *row*, as :func:`jsonify` does for a model instance.
+        """
+        response = encoder.jsonify(self.__model__.serializer().for_rows()(row))
+        return add_link_headers(response, self.__model__.row_links(row))
+
     def _meta(self):
         """Return a description of this resource as reported by the
         database."""
-        return flask.jsonify(self.__model__.description())
+        return encoder.jsonify(self.__model__.description())
 
     def _resource(self, resource_id):
         """Return the ``sandman2.model.Model`` instance with the given
@@ -194,56 +475,501 @@ class Service(MethodView):
 
         :rtype: :class:`sandman2.model.Model`
         """
-        resource = self.__model__.query.get(resource_id)
+        queryset = self.__model__.query
+        fields = self._fields()
+        if fields:
+            queryset = queryset.options(load_only(*fields))
+        resource = queryset.get(resource_id)
         if not resource:
             raise NotFoundException()
         return resource
 
+    def _fields(self):
+        """Return the list of fields requested with the ``fields`` URL
+        parameter, or ``None`` if all fields should be returned.
+
+        :rtype: list
+        """
+        if not request.args.get('fields'):
+            return None
+        fields = [field.strip() for field in request.args['fields'].split(',')]
+        columns = self.__model__.schema().fields
+        for field in fields:
+            if field not in columns:
+                raise BadRequestException('Invalid field [{}]'.format(field))
+        return fields
+
+    def _collection_query(self):
+        """Return the query for the collection of resources described by the
+        current request's URL parameters, along with the requested page size.
+
+        The key under which statements for the query are cached is recorded
+        for :meth:`_fetch`.
+
+        :rtype: tuple
+        """
+        filters, order, limit = self._parse_args()
+        queryset = self.__model__.query.filter(*filters).order_by(*order)
+        fields = self._fields()
+        if fields:
+            if request.args.get('sort'):
+                # keyset pagination needs the sort column of the last row
+                fields = fields + [request.args['sort'].lstrip('-')]
+            queryset = queryset.options(load_only(*fields))
+        self._statement_key = (
+            self.__model__.__table__.fullname, self._query_shape, tuple(fields or ()))
+        return queryset, limit
+
+    def _parse_args(self):
+        """Return the filters, ordering and page size described by the
+        current request's URL parameters.
+
+        Filters are parsed as described in :mod:`sandman2.filters`, and their
+        values bound as parameters. The shape of the resulting query and the
+        parameters' values are recorded for :meth:`_fetch`.
+
+        :rtype: tuple
+        """
+        args = {k: v for (k, v) in request.args.items() if k not in ('page', 'export', 'cursor', 'count', 'fields')}
+        filters = []
+        order = []
+        limit = None
+        shape = []
+        params = {}
+        schema = self.__model__.schema()
+        for key, value in args.items():
+            if key == 'sort':
+                direction = desc if value.startswith('-') else asc
+                order.append(direction(getattr(self.__model__, value.lstrip('-'))))
+                shape.append((key, value))
+            elif key == 'limit':
+                limit = int(value)
+            elif hasattr(self.__model__, key):
+                try:
+                    name, values = url_filters.parse(value, schema.filter_coercers.get(key))
+                except ValueError:
+                    raise BadRequestException('Invalid value for field [{}]'.format(key))
+                values, filter_params = url_filters.bind(
+                    name, values, 'filter{}'.format(len(filters)))
+                filters.append(url_filters.criterion(getattr(self.__model__, key), name, values))
+                shape.append((key, url_filters.shape(name, values)))
+                params.update(filter_params)
+            else:
+                raise BadRequestException('Invalid field [{}]'.format(key))
+        self._query_shape = tuple(shape)
+        self._query_params = params
+        return filters, order, limit
+
+    def _bulk_query(self):
+        """Return the query selecting the resources to be changed by a
+        collection-level PATCH or DELETE, as described by the current
+        request's URL parameters.
+
+        At least one filter is required, so that a whole table can't be
+        changed by accident.
+        """
+        filters, order, limit = self._parse_args()
+        if order or limit is not None:
+            raise BadRequestException(
+                'Sorting and limits are not supported when changing a collection')
+        if not filters:
+            raise BadRequestException(
+                'At least one filter is required to change a collection')
+        return self.__model__.query.filter(*filters)
+
+    def _bulk_change(self, change):
+        """Apply a collection-level PATCH or DELETE to the resources matching
+        the current request's filters, and return the response containing
+        the number of resources affected.
+
+        If the model has a validation hook for the request's method, each
+        matching resource is loaded and validated first.
+
+        :param change: A function applying the change to the query selecting
+                       the resources, and returning the number of rows
+                       affected
+        """
+        query = self._bulk_query()
+        if hasattr(self.__model__, 'is_valid_{}'.format(request.method.lower())):
+            for resource in query:
+                error_message = is_valid_method(self.__model__, resource)
+                if error_message:
+                    raise BadRequestException(error_message)
+        session = db.session()
+        try:
+            count = change(query)
+        except IntegrityError as exception:
+            session.rollback()
+            raise ConflictException(str(exception.orig))
+        return self._bulk_response(count)
+
+    def _bulk_response(self, count):
+        """Record that this resource's table was written, commit the current
+        transaction and return a response containing the number of resources
+        affected.
+
+        :param int count: The number of rows affected
+        """
+        session = db.session()
+        if count:
+            mark_written(session, self.__model__.__table__)
+        session.commit()
+        return encoder.jsonify({'count': count})
+
+    def _batch_get(self):
+        """Return a response containing the resources whose primary keys are
+        listed in the ``_ids`` URL parameter (as ``_ids=1,2,3``), in the order
+        requested, along with the list of keys for which no resource exists.
+
+        Resources are fetched with ``WHERE <primary key> IN (...)`` queries of
+        at most ``__batch_get_chunk_size__`` keys each.
+        """
+        name = self.__model__.primary_key()
+        schema = self.__model__.schema()
+        keys, seen = [], set()
+        for value in request.args[BATCH_GET_PARAMETER].split(','):
+            try:
+                key = schema.coerce(name, value)
+            except ValueError:
+                raise BadRequestException('Invalid value [{}]'.format(value))
+            if key not in seen:
+                seen.add(key)
+                keys.append(key)
+
+        column = getattr(self.__model__, name)
+        queryset = self.__model__.query
+        fields = self._fields()
+        if fields:
+            queryset = queryset.options(load_only(*fields))
+        found = {}
+        for start in range(0, len(keys), self.__batch_get_chunk_size__):
+            chunk = keys[start:start + self.__batch_get_chunk_size__]
+            resources, to_dict = self._fetch(queryset.filter(column.in_(chunk)))
+            for resource in resources:
+                # result rows and model instances both expose columns as attributes
+                found[getattr(resource, name)] = to_dict(resource)
+        return encoder.jsonify({
+            self.__json_collection_name__: [found[key] for key in keys if key in found],
+            'missing': [key for key in keys if key not in found],
+            })
+
     def _all_resources(self):
         """Return the complete collection of resources as a list of
         dictionaries.
 
         :rtype: :class:`sandman2.model.Model`
         """
-        queryset = self.__model__.query
-        args = {k: v for (k, v) in request.args.items() if k not in ('page', 'export')}
-        limit = None
-        if args:
-            filters = []
-            order = []
-            for key, value in args.items():
-                if value.startswith('%'):
-                    filters.append(getattr(self.__model__, key).like(str(value), escape='/'))
-                elif key == 'sort':
-                    direction = desc if value.startswith('-') else asc
-                    order.append(direction(getattr(self.__model__, value.lstrip('-'))))
-                elif key == 'limit':
-                    limit = int(value)
-                elif hasattr(self.__model__, key):
-                    filters.append(getattr(self.__model__, key) == value)
-                else:
-                    raise BadRequestException('Invalid field [{}]'.format(key))
-            queryset = queryset.filter(*filters).order_by(*order)
-        if 'page' in request.args:
-            resources = queryset.paginate(page=int(request.args['page']), per_page=limit).items
+        queryset, limit = self._collection_query()
+        resources, to_dict = self._fetch(queryset, limit=limit, cached=True)
+        return [to_dict(resource) for resource in resources]
+
+    def _stream(self, queryset, limit=None, ndjson=False):
+        """Return a response streaming the resources in *queryset* as they are
+        read from the database, as either a JSON collection or (if *ndjson* is
+        set) newline-delimited JSON.
+
+        :param queryset: The query describing the collection
+        :param int limit: The maximum number of resources to return
+        :param bool ndjson: Send one JSON resource per line
+        """
+        resources, to_dict = self._fetch(queryset, stream=True, limit=limit, cached=True)
+        resources = (to_dict(resource) for resource in resources)
+        if ndjson:
+            body = encoder.iterencode_lines(resources, self.__stream_chunk_size__)
+            mimetype = NDJSON_MIMETYPE
         else:
-            queryset = queryset.limit(limit)
-            resources = queryset.all()
-        return [r.to_dict() for r in resources]
+            body = encoder.iterencode_collection(
+                self.__json_collection_name__, resources, self.__stream_chunk_size__)
+            mimetype = current_app.config['JSONIFY_MIMETYPE']
+        return Response(stream_with_context(body), mimetype=mimetype)
+
+    def _fetch(self, queryset, stream=False, convert=False, limit=None, offset=None, cached=False):
+        """Return the resources selected by *queryset*, along with the function
+        used to turn one of them into its dictionary representation (limited
+        to the fields requested in the ``fields`` URL parameter).
+
+        If the model uses the default :meth:`sandman2.model.Model.to_dict`,
+        the query is executed as a Core ``SELECT`` and result rows are
+        converted to dictionaries directly, skipping the construction of ORM
+        instances. If *cached* is set (and *queryset* was returned by
+        :meth:`_collection_query` unchanged), the statement is taken from the
+        application's :class:`sandman2.statements.StatementCache`.
+
+        :param queryset: The query selecting the resources
+        :param bool stream: Fetch rows through a server-side cursor (where the
+                            database driver supports one)
+        :param bool convert: Convert values which can't be encoded as JSON as
+                             :meth:`sandman2.model.Model.to_dict` does, rather
+                             than leaving them for :mod:`sandman2.encoder`
+        :param int limit: The maximum number of resources to fetch
+        :param int offset: The number of resources to skip
+        :param bool cached: Use a cached statement for the query's shape
+        :rtype: tuple
+        """
+        fields = self._fields()
+        if self.__model__.to_dict is Model.to_dict:
+            serializer = self.__model__.serializer().for_rows(fields, convert)
+            mapper = self.__model__.__mapper__
+            statements = current_app.extensions.get('sandman2_statements')
+            if cached and statements is not None:
+                key = self._statement_key + (limit is not None, offset is not None, stream)
+                statement = statements.get(
+                    key, lambda: self._statement(queryset, limit, offset, stream))
+                params = dict(self._query_params)
+                if limit is not None:
+                    params['sandman2_limit'] = limit
+                if offset is not None:
+                    params['sandman2_offset'] = offset
+                result = statements.execute(
+                    db.session.connection(mapper=mapper), statement, params)
+                return result, serializer
+            statement = queryset.limit(limit).offset(offset).statement
+            if stream:
+                statement = statement.execution_options(stream_results=True)
+            result = db.session.execute(statement, mapper=mapper)
+            return result, serializer
+        queryset = queryset.limit(limit).offset(offset)
+        if stream:
+            queryset = queryset.execution_options(
+                stream_results=True).yield_per(self.__stream_chunk_size__)
+        if fields:
+            return queryset, lambda resource: resource.to_dict(fields)
+        return queryset, lambda resource: resource.to_dict()
 
-    def _export(self, collection):
-        """Return a CSV of the resources in *collection*.
+    @staticmethod
+    def _statement(queryset, limit=None, offset=None, stream=False):
+        """Return the Core statement for *queryset*, with its limit and offset
+        (if any) as bound parameters, to be cached for queries of the same
+        shape.
+        """
+        if limit is not None:
+            queryset = queryset.limit(bindparam('sandman2_limit'))
+        if offset is not None:
+            queryset = queryset.offset(bindparam('sandman2_offset'))
+        statement = queryset.statement
+        if stream:
+            statement = statement.execution_options(stream_results=True)
+        return statement
+
+    def _page(self, queryset, limit=None):
+        """Return a response containing the page of resources given by the
+        request's ``page`` parameter.
+
+        One row more than the page size is fetched to determine whether there
+        is a following page, so no ``COUNT(*)`` query is issued unless the
+        client asks for a total with ``count=true`` (an exact count) or
+        ``count=estimate`` (an approximate count taken from the database's
+        statistics, where available).
+
+        :param queryset: The query describing the collection
+        :param int limit: The number of resources per page
+        """
+        per_page = limit or 20
+        page = int(request.args['page'])
+        if page < 1:
+            raise NotFoundException()
+        resources, to_dict = self._fetch(
+            queryset, limit=per_page + 1, offset=(page - 1) * per_page, cached=True)
+        resources = list(resources)
+        if not resources and page != 1:
+            raise NotFoundException()
 
-        :param list collection: A list of resources represented by dicts
+        body = {self.__json_collection_name__: [to_dict(r) for r in resources[:per_page]]}
+        count = request.args.get('count', 'false').lower()
+        if count != 'false':
+            body['count'] = self._count(queryset, estimate=(count == 'estimate'))
+        response = encoder.jsonify(body)
+        links = {'self': request.url, 'first': self._collection_url(page=1)}
+        if page > 1:
+            links['prev'] = self._collection_url(page=page - 1)
+        if len(resources) > per_page:
+            links['next'] = self._collection_url(page=page + 1)
+        return add_link_headers(response, links)
+
+    def _count(self, queryset, estimate=False):
+        """Return the number of resources in *queryset*.
+
+        :param queryset: The query describing the collection
+        :param bool estimate: Use the row count estimated by the database's
+                              statistics if the collection is unfiltered
+        :rtype: int
         """
-        fieldnames = collection[0].keys()
-        faux_csv = ','.join(fieldnames) + '\r\n'
-        for resource in collection:
-            faux_csv += ','.join((str(x) for x in resource.values())) + '\r\n'
-        response = make_response(faux_csv)
-        response.mimetype = 'text/csv'
-        return response
+        if estimate and queryset.whereclause is None:
+            count = self.__model__.estimated_count()
+            if count is not None:
+                return count
+        return queryset.order_by(None).count()
+
+    @staticmethod
+    def _collection_url(**parameters):
+        """Return the URL of the current collection request with the given URL
+        *parameters* replaced.
+
+        :rtype: str
+        """
+        args = request.args.to_dict(flat=False)
+        for key, value in parameters.items():
+            args[key] = [value]
+        return '{}?{}'.format(request.base_url, urlencode(args, doseq=True))
+
+    def _cursor_page(self, queryset, limit=None):
+        """Return a response containing the page of resources following the
+        position encoded in the request's ``cursor`` parameter.
+
+        Rather than skipping rows with ``OFFSET``, the page is found by seeking
+        past the last-seen values of the ``sort`` column and the primary key
+        (used as a tie-breaker), so each page costs a single index seek. The
+        cursor for the following page is sent in the ``Link`` header with
+        ``rel=next``.
+
+        :param queryset: The query describing the collection
+        :param int limit: The number of resources per page
+        """
+        per_page = limit or 20
+        keys = self._keyset_keys()
+        sort = request.args.get('sort', '')
+        if request.args['cursor']:
+            values = self._decode_cursor(request.args['cursor'], sort, len(keys))
+            dialect = db.session.get_bind().dialect.name
+            queryset = queryset.filter(self._keyset_filter(
+                keys, values, dialect in NULLS_FIRST_DIALECTS, dialect in ROW_VALUE_DIALECTS))
+        if not sort or len(keys) > 1:
+            # order by the primary key as (or in addition to) the sort column
+            queryset = queryset.order_by(keys[-1][0])
+        resources, to_dict = self._fetch(queryset, limit=per_page + 1)
+        resources = list(resources)
+
+        response = encoder.jsonify({
+            self.__json_collection_name__: [to_dict(r) for r in resources[:per_page]]
+            })
+        links = {'self': request.url}
+        if len(resources) > per_page:
+            last = resources[per_page - 1]
+            cursor = self._encode_cursor(
+                sort, [getattr(last, column.key) for column, _ in keys])
+            links['next'] = self._collection_url(cursor=cursor)
+        return add_link_headers(response, links)
+
+    def _keyset_keys(self):
+        """Return the ``(column, descending)`` pairs a keyset page is ordered
+        by: the requested ``sort`` column (if any) followed by the primary
+        key.
+
+        :rtype: list
+        """
+        keys = []
+        sort = request.args.get('sort')
+        if sort:
+            keys.append((getattr(self.__model__, sort.lstrip('-')), sort.startswith('-')))
+        primary_key = getattr(self.__model__, self.__model__.primary_key())
+        if not keys or keys[0][0] is not primary_key:
+            keys.append((primary_key, False))
+        return keys
+
+    @staticmethod
+    def _keyset_filter(keys, values, nulls_first=True, row_values=False):
+        """Return the clause selecting rows positioned after *values* in the
+        ordering described by *keys*.
+
+        ``NULL`` values of nullable columns are placed where the database
+        sorts them: before all other values in ascending order if
+        *nulls_first*, and after them otherwise.
+
+        :param list keys: ``(column, descending)`` pairs
+        :param list values: The last-seen value of each column in *keys*
+        :param bool nulls_first: ``NULL`` sorts before other values
+        :param bool row_values: The database supports row value comparisons,
+                                used where all columns are sorted in the same
+                                direction (otherwise, the comparison is
+                                expanded into ``OR`` and ``AND`` clauses)
+        """
+        directions = set(descending for _, descending in keys)
+        nullable = any(column.expression.nullable for column, _ in keys)
+        if row_values and len(directions) == 1 and not nullable:
+            columns = tuple_(*[column for column, _ in keys])
+            if directions.pop():
+                return columns < tuple_(*values)
+            return columns > tuple_(*values)
+        clauses = []
+        preceding = []
+        for (column, descending), value in zip(keys, values):
+            # NULLs come after the column's values in this direction
+            nulls_after = nulls_first == descending
+            if value is None:
+                if not nulls_after:
+                    clauses.append(and_(*(preceding + [column.isnot(None)])))
+                preceding.append(column.is_(None))
+                continue
+            following = column < value if descending else column > value
+            if nulls_after and column.expression.nullable:
+                following = or_(following, column.is_(None))
+            clauses.append(and_(*(preceding + [following])))
+            preceding.append(column == value)
+        return or_(*clauses)
+
+    @staticmethod
+    def _encode_cursor(sort, values):
+        """Return an opaque cursor for the position described by *values* in a
+        collection sorted by *sort*.
+
+        :rtype: str
+        """
+        payload = json.dumps({'sort': sort, 'values': values}, default=str)
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
 
+    @staticmethod
+    def _decode_cursor(cursor, sort, length):
+        """Return the list of values encoded in *cursor*, raising a
+        :class:`sandman2.exception.BadRequestException` if it is malformed or
+        was issued for a different ``sort`` order.
+
+        :rtype: list
+        """
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            values = payload['values']
+        except (ValueError, TypeError, KeyError):
+            raise BadRequestException('Invalid cursor [{}]'.format(cursor))
+        if not isinstance(payload, dict) or not isinstance(values, list):
+            raise BadRequestException('Invalid cursor [{}]'.format(cursor))
+        if payload.get('sort') != sort or len(values) != length:
+            raise BadRequestException('Cursor does not match the requested sort order')
+        return values
+
+    def _export(self, queryset, limit=None):
+        """Return a streamed CSV response of the resources in *queryset*.
+
+        Rows are read through a server-side cursor (where the database driver
+        supports one) and written out ``__stream_chunk_size__`` rows at a time,
+        so the collection is never held in memory as a whole.
+
+        :param queryset: The query describing the resources to export
+        :param int limit: The maximum number of resources (per page) to export
+        """
+        offset = None
+        if 'page' in request.args:
+            per_page = limit or 20
+            offset = (int(request.args['page']) - 1) * per_page
+            limit = per_page
+        fieldnames = self._fields() or self.__model__.__table__.columns.keys()
+        chunk_size = self.__stream_chunk_size__
+        rows, to_dict = self._fetch(
+            queryset, stream=True, convert=True, limit=limit, offset=offset, cached=True)
+
+        def generate():
+            """Yield the CSV document in chunks of *chunk_size* rows."""
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(fieldnames)
+            for count, resource in enumerate(rows, 1):
+                writer.writerow(to_dict(resource).values())
+                if count % chunk_size == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+
+        return Response(stream_with_context(generate()), mimetype='text/csv')
 
     @staticmethod
     def _no_content_response():
@@ -0,0 +1,70 @@
+"""A cache of the SQL statements built for collection queries.
+
+Most requests for a collection differ only in the values of their filters
+and page, not in the fields filtered on, the operators, the sort order or
+the fields selected. Statements are built with bound parameters in place of
+those values and cached by that *shape*, so a repeated shape reuses both the
+statement and (through SQLAlchemy's ``compiled_cache`` connection option)
+its compiled SQL.
+"""
+
+# Third-party imports
+from sqlalchemy.util import LRUCache
+
+
+class StatementCache(object):
+
+    """Caches SQL statements by the shape of the query they implement.
+
+    Statements are executed with :meth:`execute`, which compiles each
+    statement once per database dialect.
+    """
+
+    def __init__(self, size=100):
+        """Create a cache holding up to *size* statements.
+
+        :param int size: The maximum number of statements (and of compiled
+                         forms of them) to keep
+        """
+        self._statements = LRUCache(size)
+        self._compiled = LRUCache(size)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """Return the statement cached for *key*, calling *build* to build it
+        if it isn't cached.
+
+        :param key: A hashable description of the statement's shape
+        :param build: A function returning the statement
+        """
+        statement = self._statements.get(key)
+        if statement is None:
+            self.misses += 1
+            statement = self._statements[key] = build()
+        else:
+            self.hits += 1
+        return statement
+
+    def execute(self, connection, statement, params):
+        """Execute *statement* with *params* on *connection*, reusing its
+        compiled form if it was executed before.
+
+        :param connection: The :class:`sqlalchemy.engine.Connection` to use
+        :param statement: A statement returned by :meth:`get`
+        :param dict params: The values of the statement's bound parameters
+        """
+        return connection.execution_options(
+            compiled_cache=self._compiled).execute(statement, params)
+
+    def stats(self):
+        """Return the cache's counters.
+
+        :rtype: dict
+        """
+        return {
+            'size': len(self._statements),
+            'compiled': len(self._compiled),
+            'hits': self.hits,
+            'misses': self.misses,
+            }
@@ -0,0 +1,144 @@
+"""Tracking of the writes made to each table, used to validate responses
+without rendering them."""
+
+# Standard library imports
+import threading
+import uuid
+
+# Third-party imports
+from flask_sqlalchemy import SignallingSession
+from sqlalchemy import event
+
+# Application imports
+from sandman2.cache import DEFAULT_PREFIX
+
+#: The key of the set of tables written during a transaction in
+#: ``Session.info``.
+WRITTEN_TABLES_KEY = 'sandman2_written_tables'
+
+
+class TableVersions(object):
+
+    """A counter, for each table, of the transactions which wrote to it.
+
+    Counters are held in memory and start over when the process restarts, so
+    each set of counters carries a random :attr:`token` which must be combined
+    with a table's version to identify it uniquely.
+    """
+
+    def __init__(self):
+        #: Identifies this set of counters.
+        self.token = uuid.uuid4().hex
+        self._versions = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def get(self, table):
+        """Return the current version of *table*.
+
+        :param str table: The (schema-qualified) name of the table
+        :rtype: int
+        """
+        return self._versions.get(table, 0)
+
+    def bump(self, table):
+        """Record a write to *table*.
+
+        :param str table: The (schema-qualified) name of the table
+        """
+        with self._lock:
+            self._versions[table] = self._versions.get(table, 0) + 1
+        for listener in self._listeners:
+            listener(table)
+
+    def add_listener(self, listener):
+        """Call *listener* with the name of each table written from now on.
+
+        :param listener: A function accepting a table name
+        """
+        self._listeners.append(listener)
+
+
+def mark_written(session, table):
+    """Record that *table* is written in *session*'s current transaction.
+
+    Changes made through the ORM unit of work are recorded automatically; bulk
+    statements executed directly must be recorded with this function.
+
+    :param session: The :class:`sqlalchemy.orm.Session` making the change
+    :param table: The :class:`sqlalchemy.Table` being written
+    """
+    session.info.setdefault(WRITTEN_TABLES_KEY, set()).add(table.fullname)
+
+
+class SharedTableVersions(TableVersions):
+
+    """Table versions kept in a Redis (or Redis-protocol compatible) server,
+    so every process serving the same database sees the same versions.
+
+    Each write also publishes the name of the table on the
+    ``<prefix>invalidate`` channel, for other consumers of the server to drop
+    anything they derived from the table.
+    """
+
+    def __init__(self, client, prefix=DEFAULT_PREFIX):
+        """Share versions through *client*.
+
+        :param client: A :class:`redis.Redis` (or compatible) client
+        :param str prefix: The prefix of all keys used
+        """
+        super(SharedTableVersions, self).__init__()
+        self.client = client
+        self.prefix = prefix
+        client.setnx(prefix + 'token', self.token)
+        self.token = _text(client.get(prefix + 'token'))
+
+    def get(self, table):
+        """Return the current version of *table*.
+
+        :param str table: The (schema-qualified) name of the table
+        :rtype: int
+        """
+        return int(self.client.get(self.prefix + 'version:' + table) or 0)
+
+    def bump(self, table):
+        """Record a write to *table* and notify other processes.
+
+        :param str table: The (schema-qualified) name of the table
+        """
+        self.client.incr(self.prefix + 'version:' + table)
+        self.client.publish(self.prefix + 'invalidate', table)
+        for listener in self._listeners:
+            listener(table)
+
+
+def _text(value):
+    """Return *value*, as returned by a Redis client, as a string."""
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+
+@event.listens_for(SignallingSession, 'after_flush')
+def _record_flushed_tables(session, _):
+    """Record the tables of all instances written by a flush."""
+    for instance in session.new | session.dirty | session.deleted:
+        table = getattr(instance, '__table__', None)
+        if table is not None:
+            mark_written(session, table)
+
+
+@event.listens_for(SignallingSession, 'after_commit')
+def _bump_written_tables(session):
+    """Bump the version of each table written by a committed transaction."""
+    written = session.info.pop(WRITTEN_TABLES_KEY, ())
+    versions = session.app.extensions.get('sandman2_versions')
+    if versions is not None:
+        for table in written:
+            versions.bump(table)
+
+
+@event.listens_for(SignallingSession, 'after_rollback')
+def _forget_written_tables(session):
+    """Discard the tables recorded by a transaction which was rolled back."""
+    session.info.pop(WRITTEN_TABLES_KEY, None)
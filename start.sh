@@ -3,7 +3,7 @@
 # Start sandman2
 
 if [ "$DB_TYPE" = "sqlite" ]; then
-    sandman2ctl -p $PORT $DB_TYPE+$DB_DRIVER:///$DATABASE
+    sandman2ctl --workers $WORKERS --threads $THREADS -p $PORT $DB_TYPE+$DB_DRIVER:///$DATABASE
 else
-    sandman2ctl -p $PORT $DB_TYPE+$DB_DRIVER://$USERNAME:$PASSWORD@$DB_NAME:$DB_PORT/$DATABASE
+    sandman2ctl --workers $WORKERS --threads $THREADS -p $PORT $DB_TYPE+$DB_DRIVER://$USERNAME:$PASSWORD@$DB_NAME:$DB_PORT/$DATABASE
 fi
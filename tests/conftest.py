@@ -8,6 +8,7 @@ import sys
 sys.path.insert(0, os.path.abspath('.'))
 
 import pytest
+from sqlalchemy import event
 
 from sandman2 import get_app, db
 
@@ -19,6 +20,12 @@ def app(request):
     database = getattr(request.module, 'database', 'db.sqlite3')
     read_only = getattr(request.module, 'read_only', False)
     exclude_tables = getattr(request.module, 'exclude_tables', None)
+    json_backend = getattr(request.module, 'json_backend', 'json')
+    etag = getattr(request.module, 'etag', 'content')
+    cache_size = getattr(request.module, 'cache_size', 0)
+    pool_size = getattr(request.module, 'pool_size', None)
+    statement_timeout = getattr(request.module, 'statement_timeout', None)
+    lazy = getattr(request.module, 'lazy', False)
     test_database_path = os.path.join('tests', 'data', 'test_db.sqlite3')
     pristine_database_path = os.path.join('tests', 'data', database)
 
@@ -38,7 +45,13 @@ def app(request):
             test_database_path),
         user_models=user_models,
         exclude_tables=exclude_tables,
-        read_only=read_only)
+        read_only=read_only,
+        json_backend=json_backend,
+        etag=etag,
+        cache_size=cache_size,
+        pool_size=pool_size,
+        statement_timeout=statement_timeout,
+        lazy=lazy)
     application.testing = True
 
     yield application
@@ -47,3 +60,20 @@ def app(request):
         db.session.remove()
         db.drop_all()
     os.unlink(test_database_path)
+
+
+@pytest.yield_fixture(scope='function')
+def statements(app):
+    """Yield the list of the SQL statements executed by the application's
+    database engine while the test runs."""
+    executed = []
+
+    def before_cursor_execute(*args):
+        """Record a statement."""
+        executed.append(args[2])
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    yield executed
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
@@ -0,0 +1,59 @@
+"""Tests for the in-process response cache."""
+import json
+
+from pytest_flask.fixtures import client
+
+from sandman2.cache import ResponseCache
+
+cache_size = 1024 * 1024
+
+
+def test_cache_hit(client):
+    """Is a repeated request served from the cache?"""
+    response = client.get('/artist/?Name=AC/DC')
+    assert response.headers['X-Cache'] == 'MISS'
+    cached = client.get('/artist/?Name=AC/DC')
+    assert cached.headers['X-Cache'] == 'HIT'
+    assert cached.get_data() == response.get_data()
+    assert cached.headers['ETag'] == response.headers['ETag']
+    assert client.get('/artist/?Name=Calexico').headers['X-Cache'] == 'MISS'
+
+
+def test_cache_invalidated_by_write(client):
+    """Are cached responses for a table dropped when it is written?"""
+    client.get('/artist/1')
+    client.get('/album/1')
+    response = client.patch(
+        '/artist/1',
+        data=json.dumps({'Name': 'Jeff Knupp'}),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 200
+    response = client.get('/artist/1')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.json['Name'] == 'Jeff Knupp'
+    assert client.get('/album/1').headers['X-Cache'] == 'HIT'
+
+
+def test_cache_metrics(client):
+    """Are the cache's counters exposed?"""
+    client.get('/artist/1')
+    client.get('/artist/1')
+    response = client.get('/_metrics')
+    assert response.status_code == 200
+    assert response.json['cache']['hits'] == 1
+    assert response.json['cache']['misses'] == 1
+    assert response.json['cache']['entries'] == 1
+
+
+def test_cache_eviction():
+    """Are the least recently used entries evicted to stay within the size
+    limit?"""
+    cache = ResponseCache(10)
+    cache.set(('a', 1), (b'12345', 200, []))
+    cache.set(('b', 1), (b'12345', 200, []))
+    assert cache.get(('a', 1)) is not None
+    cache.set(('c', 1), (b'12345', 200, []))
+    assert cache.get(('b', 1)) is None
+    assert cache.get(('a', 1)) is not None
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] == 10
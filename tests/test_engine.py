@@ -0,0 +1,51 @@
+"""Tests for the configuration of the database engine."""
+import json
+
+import pytest
+from pytest_flask.fixtures import client
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from sandman2.engine import engine_options, MeasuredQueuePool
+from sandman2.model import db
+
+pool_size = 2
+statement_timeout = 0.2
+
+SLOW_QUERY = text(
+    'WITH RECURSIVE numbers(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM numbers) '
+    'SELECT count(*) FROM (SELECT n FROM numbers LIMIT 100000000)')
+
+
+def test_pool_options(app):
+    """Is the engine created with the requested pool?"""
+    with app.app_context():
+        assert isinstance(db.engine.pool, MeasuredQueuePool)
+        assert db.engine.pool.size() == 2
+
+
+def test_pool_options_in_memory():
+    """Are the pool options ignored for in-memory SQLite databases?"""
+    assert engine_options('sqlite://', pool_size=2) == {}
+    assert engine_options('sqlite:///:memory:', pool_size=2, pool_pre_ping=True) == {
+        'pool_pre_ping': True}
+    assert engine_options('sqlite:///db.sqlite3', pool_size=2)['pool_size'] == 2
+
+
+def test_pool_metrics(client):
+    """Are pool checkouts and utilization reported?"""
+    client.get('/artist/1')
+    stats = json.loads(client.get('/_metrics').get_data(as_text=True))['pool']
+    assert stats['size'] == 2
+    assert stats['checkouts'] >= 1
+    assert stats['wait_seconds_max'] >= 0
+    assert 0 <= stats['utilization'] <= 1
+
+
+def test_statement_timeout(app):
+    """Is a statement running past the timeout aborted?"""
+    with app.app_context():
+        with pytest.raises(OperationalError):
+            db.session.execute(SLOW_QUERY).scalar()
+        db.session.rollback()
+        assert db.session.execute(text('SELECT 1')).scalar() == 1
@@ -1,4 +1,5 @@
 """Tests for non-core functionality in sandman2."""
+import base64
 
 from pytest_flask.fixtures import client
 
@@ -34,6 +35,56 @@ def test_wildcard_filtering(client):
     assert response.json['resources'][0]['ArtistId'] == 1
 
 
+def test_comparison_filtering(client):
+    """Are values compared as numbers when filtering a numeric field?"""
+    response = client.get('/invoice/?Total=gte:20')
+    assert response.status_code == 200
+    totals = [invoice['Total'] for invoice in response.json['resources']]
+    assert totals and all(total >= 20 for total in totals)
+
+
+def test_between_filtering(client):
+    """Can we filter a date field on a range?"""
+    response = client.get('/invoice/?InvoiceDate=between:2008-12-31 12:00,2009-01-06 00:00:00')
+    assert response.status_code == 200
+    assert [invoice['InvoiceId'] for invoice in response.json['resources']] == [1, 2, 3, 4]
+
+
+def test_date_equality_filtering(client):
+    """Does an equality filter on a date field match the date as stored?"""
+    response = client.get('/invoice/?InvoiceDate=2009-01-01 00:00:00')
+    assert response.status_code == 200
+    assert [invoice['InvoiceId'] for invoice in response.json['resources']] == [1]
+
+
+def test_in_filtering(client):
+    """Can we filter on a list of values?"""
+    response = client.get('/artist/?ArtistId=in:3,1')
+    assert response.status_code == 200
+    assert [artist['ArtistId'] for artist in response.json['resources']] == [1, 3]
+
+
+def test_null_filtering(client):
+    """Can we filter on whether a field is NULL?"""
+    null = client.get('/customer/?Company=isnull').json['resources']
+    not_null = client.get('/customer/?Company=notnull').json['resources']
+    assert all(customer['Company'] is None for customer in null)
+    assert all(customer['Company'] is not None for customer in not_null)
+    assert len(null) + len(not_null) == len(client.get('/customer/').json['resources'])
+
+
+def test_filtering_invalid_value(client):
+    """Is a value that can't be converted to the field's type rejected?"""
+    response = client.get('/artist/?ArtistId=gt:one')
+    assert response.status_code == 400
+
+
+def test_filtering_invalid_decimal(client):
+    """Is a value that can't be converted to a numeric field rejected?"""
+    assert client.get('/invoice/?Total=gt:abc').status_code == 400
+    assert client.get('/invoice/?Total=abc').status_code == 400
+
+
 def test_sorting(client):
     """Do we return sorted results when a 'sort' URL parameter is provided?"""
     response = client.get('/artist/?sort=Name')
@@ -64,3 +115,121 @@ def test_sort_limit_and_pagination(client):
     assert response.status_code == 200
     assert len(response.json['resources']) == 2
     assert response.json['resources'][0]['ArtistId'] == 3
+
+
+def test_cursor_pagination(client):
+    """Can we walk a collection using the cursor in the 'next' link?"""
+    response = client.get('/artist/?cursor=&limit=100')
+    assert response.status_code == 200
+    assert len(response.json['resources']) == 100
+    assert response.json['resources'][0]['ArtistId'] == 1
+    seen = [r['ArtistId'] for r in response.json['resources']]
+    while 'rel=next' in response.headers['Link']:
+        next_link = [link for link in response.headers['Link'].split(', ')
+                     if link.endswith('rel=next')][0]
+        response = client.get(next_link[1:next_link.index('>')])
+        assert response.status_code == 200
+        seen.extend(r['ArtistId'] for r in response.json['resources'])
+    assert seen == list(range(1, 277))
+
+
+def test_cursor_pagination_sorted(client):
+    """Does cursor pagination honor the 'sort' parameter?"""
+    response = client.get('/artist/?cursor=&sort=-Name&limit=2')
+    assert response.status_code == 200
+    assert response.json['resources'][0]['ArtistId'] == 155
+    next_link = [link for link in response.headers['Link'].split(', ')
+                 if link.endswith('rel=next')][0]
+    response = client.get(next_link[1:next_link.index('>')])
+    sorted_response = client.get('/artist/?sort=-Name&limit=4')
+    assert response.json['resources'] == sorted_response.json['resources'][2:]
+
+
+def test_cursor_pagination_nullable_sort(client):
+    """Can we walk a collection sorted by a column containing NULLs to the
+    end, in either direction?"""
+    for sort in ('Composer', '-Composer'):
+        response = client.get('/track/?cursor=&sort={}&limit=500'.format(sort))
+        seen = [r['TrackId'] for r in response.json['resources']]
+        while 'rel=next' in response.headers['Link']:
+            next_link = [link for link in response.headers['Link'].split(', ')
+                         if link.endswith('rel=next')][0]
+            response = client.get(next_link[1:next_link.index('>')])
+            assert response.status_code == 200
+            seen.extend(r['TrackId'] for r in response.json['resources'])
+        assert len(seen) == 3503
+        assert sorted(seen) == list(range(1, 3504))
+
+
+def test_cursor_pagination_invalid_cursor(client):
+    """Do we reject a cursor we didn't issue?"""
+    response = client.get('/artist/?cursor=foo')
+    assert response.status_code == 400
+    for payload in ('[1, 2]', '{"sort": "", "values": 1}', '"values"'):
+        cursor = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        response = client.get('/artist/?cursor=' + cursor)
+        assert response.status_code == 400
+
+
+def test_pagination_links(client):
+    """Do paginated responses link to the neighbouring pages without
+    including a count?"""
+    response = client.get('/artist/?page=2')
+    assert response.status_code == 200
+    assert 'count' not in response.json
+    assert 'page=1>; rel=prev' in response.headers['Link']
+    assert 'page=3>; rel=next' in response.headers['Link']
+    response = client.get('/artist/?page=14')
+    assert len(response.json['resources']) == 16
+    assert 'rel=next' not in response.headers['Link']
+
+
+def test_pagination_count(client):
+    """Do we include the size of the collection when asked?"""
+    response = client.get('/artist/?page=1&count=true')
+    assert response.status_code == 200
+    assert response.json['count'] == 276
+    response = client.get('/artist/?page=1&count=estimate&Name=AC/DC')
+    assert response.json['count'] == 1
+
+
+def test_pagination_out_of_range(client):
+    """Do we get a 404 for a page past the end of the collection?"""
+    response = client.get('/artist/?page=15')
+    assert response.status_code == 404
+
+
+def test_fields(client):
+    """Do we return only the fields requested in the 'fields' parameter?"""
+    response = client.get('/track/?fields=Name,Composer&limit=2')
+    assert response.status_code == 200
+    assert response.json['resources'][0] == {
+        'Name': 'For Those About To Rock (We Salute You)',
+        'Composer': 'Angus Young, Malcolm Young, Brian Johnson',
+        }
+    response = client.get('/track/1?fields=TrackId,Bytes')
+    assert response.status_code == 200
+    assert response.json == {'TrackId': 1, 'Bytes': 11170334}
+
+
+def test_fields_export(client):
+    """Are only the requested fields exported?"""
+    response = client.get('/genre/?export&fields=Name&limit=2')
+    assert response.get_data(as_text=True) == 'Name\r\nRock\r\nJazz\r\n'
+
+
+def test_fields_unknown_field(client):
+    """Do we reject a request for a field the resource doesn't have?"""
+    response = client.get('/track/?fields=Foo')
+    assert response.status_code == 400
+
+
+def test_collection_matches_resources(client):
+    """Are resources in a collection serialized exactly as when they are
+    retrieved individually?"""
+    response = client.get('/invoice/?limit=5')
+    assert response.status_code == 200
+    for resource in response.json['resources']:
+        single = client.get('/invoice/{}'.format(resource['InvoiceId']))
+        assert single.json == resource
+    assert isinstance(response.json['resources'][0]['Total'], float)
@@ -0,0 +1,35 @@
+"""Tests for the pluggable JSON encoding of responses."""
+import json
+
+import pytest
+from pytest_flask.fixtures import client
+
+pytest.importorskip('orjson')
+
+json_backend = 'orjson'
+
+
+def test_get_collection(client):
+    """Can we GET a collection encoded by orjson?"""
+    response = client.get('/invoice/?limit=5')
+    assert response.status_code == 200
+    assert response.headers['Content-type'] == 'application/json'
+    resources = json.loads(response.get_data(as_text=True))['resources']
+    assert len(resources) == 5
+    assert resources[0]['InvoiceDate'] == '2009-01-01T00:00:00'
+    assert resources[0]['Total'] == 1.98
+
+
+def test_get_resource(client):
+    """Is a single resource encoded the same way as in a collection?"""
+    response = client.get('/invoice/1')
+    assert response.status_code == 200
+    collection = client.get('/invoice/?InvoiceId=1')
+    assert collection.json['resources'] == [response.json]
+
+
+def test_error_response(client):
+    """Are error messages encoded by the configured backend?"""
+    response = client.get('/artist/?Foo=bar')
+    assert response.status_code == 400
+    assert response.json == {'message': 'Invalid field [Foo]'}
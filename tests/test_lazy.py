@@ -0,0 +1,86 @@
+"""Tests for reflecting tables on the first request for them."""
+import json
+
+from pytest_flask.fixtures import client
+from sqlalchemy import MetaData
+
+from tests.resources import ARTIST_META, NEW_ALBUM
+
+lazy = True
+
+
+def test_index_lists_tables(app, client):
+    """Are all tables listed before any is requested?"""
+    response = client.get('/')
+    assert response.status_code == 200
+    routes = json.loads(response.get_data(as_text=True))
+    assert routes['Artist'] == '/artist'
+    assert routes['Album'] == '/album'
+    assert app.classes == []
+
+
+def test_get_resource(app, client):
+    """Is a table reflected, once, on the first request for it?"""
+    response = client.get('/artist/1')
+    assert response.status_code == 200
+    assert json.loads(response.get_data(as_text=True)) == {'ArtistId': 1, 'Name': 'AC/DC'}
+    assert client.get('/artist/2').status_code == 200
+    assert len(app.classes) == 1
+    routes = json.loads(client.get('/').get_data(as_text=True))
+    assert routes['Artist'] == '/artist{/ArtistId}'
+    assert routes['Album'] == '/album'
+
+
+def test_collection_and_meta(client):
+    """Are collections and /meta served?"""
+    response = client.get('/artist/?Name=AC/DC')
+    assert len(json.loads(response.get_data(as_text=True))['resources']) == 1
+    response = client.get('/artist/meta')
+    assert json.loads(response.get_data(as_text=True)) == ARTIST_META
+
+
+def test_links_to_unrequested_table(client):
+    """Do links to a referenced table which wasn't requested work?"""
+    response = client.get('/album/1')
+    assert '</artist/1>; rel=related' in response.headers['Link']
+    assert client.get('/artist/1').status_code == 200
+
+
+def test_referenced_tables_not_reflected(client, monkeypatch):
+    """Is only the requested table reflected, with links to the tables it
+    references built from its foreign keys?"""
+    reflected = []
+    reflect = MetaData.reflect
+
+    def record(metadata, *args, **kwargs):
+        """Reflect the tables, recording their names."""
+        reflect(metadata, *args, **kwargs)
+        reflected.extend(metadata.tables)
+    monkeypatch.setattr(MetaData, 'reflect', record)
+    response = client.get('/track/?TrackId=1')
+    assert reflected == ['Track']
+    assert json.loads(response.get_data(as_text=True))['resources'][0]['Name'] == \
+        'For Those About To Rock (We Salute You)'
+    response = client.get('/track/1')
+    assert '</album/1>; rel=related' in response.headers['Link']
+    assert '</genre/1>; rel=related' in response.headers['Link']
+
+
+def test_write(client):
+    """Are writes routed to the table's service?"""
+    response = client.post(
+        '/album/',
+        data=json.dumps({'Title': 'Some Title', 'ArtistId': 1}),
+        headers={'Content-Type': 'application/json'})
+    assert response.status_code == 201
+    assert json.loads(response.get_data(as_text=True)) == NEW_ALBUM
+    assert client.delete('/album/348').status_code == 204
+    assert client.get('/album/348').status_code == 404
+
+
+def test_unknown_routes(client):
+    """Are unknown tables, invalid IDs and disallowed methods rejected?"""
+    assert client.get('/nosuchtable/').status_code == 404
+    assert client.get('/artist/abc').status_code == 404
+    assert client.post('/artist/1').status_code == 405
+    assert client.put('/artist/').status_code == 405
@@ -0,0 +1,79 @@
+"""Tests for storing the reflected tables in a snapshot file."""
+import json
+import os
+import shutil
+
+import pytest
+from sqlalchemy import create_engine, MetaData
+
+from sandman2 import get_app
+from sandman2.model import db
+from sandman2.reflection import ReflectionSnapshot
+
+DATABASE_PATH = os.path.join('tests', 'data', 'test_reflection.sqlite3')
+SNAPSHOT_PATH = os.path.join('tests', 'data', 'test_reflection.pickle')
+
+
+@pytest.yield_fixture
+def engine():
+    """Yield the engine of a copy of the test database, removing the copy
+    and any snapshot afterwards."""
+    shutil.copy(os.path.join('tests', 'data', 'db.sqlite3'), DATABASE_PATH)
+    database_engine = create_engine('sqlite+pysqlite:///{}'.format(DATABASE_PATH))
+    yield database_engine
+    database_engine.dispose()
+    os.unlink(DATABASE_PATH)
+    if os.path.exists(SNAPSHOT_PATH):
+        os.unlink(SNAPSHOT_PATH)
+
+
+def fail_to_reflect(*args, **kwargs):
+    """Stand in for MetaData.reflect where reflection must not happen."""
+    raise AssertionError('The database was reflected')
+
+
+def test_snapshot_taken_and_loaded(engine, monkeypatch):
+    """Is the snapshot taken on first use, and then loaded instead of
+    reflecting the database?"""
+    tables = set(ReflectionSnapshot(SNAPSHOT_PATH, engine).metadata().tables)
+    assert 'Artist' in tables
+    assert os.path.exists(SNAPSHOT_PATH)
+    monkeypatch.setattr(MetaData, 'reflect', fail_to_reflect)
+    metadata = ReflectionSnapshot(SNAPSHOT_PATH, engine).metadata()
+    assert set(metadata.tables) == tables
+    assert 'ArtistId' in metadata.tables['Album'].columns
+
+
+def test_snapshot_refreshed_on_schema_change(engine):
+    """Is the database reflected again after its schema changes?"""
+    snapshot = ReflectionSnapshot(SNAPSHOT_PATH, engine)
+    snapshot.metadata()
+    assert not snapshot.refresh()
+    engine.execute('CREATE TABLE Label (LabelId INTEGER PRIMARY KEY, Name TEXT)')
+    assert 'Label' in ReflectionSnapshot(SNAPSHOT_PATH, engine).metadata().tables
+    assert snapshot.refresh()
+    assert not snapshot.refresh()
+
+
+def test_unreadable_snapshot(engine):
+    """Is an unreadable snapshot replaced?"""
+    with open(SNAPSHOT_PATH, 'wb') as snapshot_file:
+        snapshot_file.write(b'not a snapshot')
+    assert 'Artist' in ReflectionSnapshot(SNAPSHOT_PATH, engine).metadata().tables
+    assert 'Artist' in ReflectionSnapshot(SNAPSHOT_PATH, engine).load(
+        str(engine.execute('PRAGMA schema_version').scalar())).tables
+
+
+def test_app_from_snapshot(engine, monkeypatch):
+    """Does an application started from a snapshot serve the database?"""
+    ReflectionSnapshot(SNAPSHOT_PATH, engine).metadata()
+    monkeypatch.setattr(MetaData, 'reflect', fail_to_reflect)
+    application = get_app(
+        'sqlite+pysqlite:///{}'.format(DATABASE_PATH),
+        reflection_cache=SNAPSHOT_PATH)
+    application.testing = True
+    response = application.test_client().get('/artist/1')
+    assert json.loads(response.get_data(as_text=True)) == {'ArtistId': 1, 'Name': 'AC/DC'}
+    with application.app_context():
+        db.session.remove()
+        db.engine.dispose()
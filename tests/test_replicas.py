@@ -0,0 +1,120 @@
+"""Tests for serving GET requests from read replicas."""
+import json
+import os
+import shutil
+import sqlite3
+import time
+
+import pytest
+
+from sandman2 import get_app
+from sandman2.model import db
+
+PRIMARY_PATH = os.path.join('tests', 'data', 'test_primary.sqlite3')
+REPLICA_PATH = os.path.join('tests', 'data', 'test_replica.sqlite3')
+
+
+def make_app(replica_uris, **kwargs):
+    """Return an application reading from *replica_uris*, with the test
+    database as its primary."""
+    shutil.copy(os.path.join('tests', 'data', 'db.sqlite3'), PRIMARY_PATH)
+    application = get_app(
+        'sqlite+pysqlite:///{}'.format(PRIMARY_PATH),
+        replica_uris=replica_uris,
+        **kwargs)
+    application.testing = True
+    return application
+
+
+def make_replica_client(**kwargs):
+    """Yield a client of an application with one replica, whose copy of
+    the first artist has a different name."""
+    shutil.copy(os.path.join('tests', 'data', 'db.sqlite3'), REPLICA_PATH)
+    connection = sqlite3.connect(REPLICA_PATH)
+    connection.execute("UPDATE Artist SET Name = 'Replica' WHERE ArtistId = 1")
+    connection.commit()
+    connection.close()
+    application = make_app(['sqlite+pysqlite:///{}'.format(REPLICA_PATH)], **kwargs)
+    yield application.test_client()
+    with application.app_context():
+        db.session.remove()
+    os.unlink(PRIMARY_PATH)
+    os.unlink(REPLICA_PATH)
+
+
+@pytest.fixture
+def replica_client():
+    """Yield a client of an application with one replica."""
+    yield from make_replica_client()
+
+
+@pytest.fixture
+def cached_replica_client():
+    """Yield a client of an application with one replica, a response cache
+    and version ETags."""
+    yield from make_replica_client(
+        cache_size=1 << 20, etag='version', replica_cache_ttl=0.2)
+
+
+def artist_name(client, **kwargs):
+    """Return the name of the first artist."""
+    response = client.get('/artist/1', **kwargs)
+    return json.loads(response.get_data(as_text=True))['Name']
+
+
+def test_get_from_replica(replica_client):
+    """Are GET requests served from the replica?"""
+    assert artist_name(replica_client) == 'Replica'
+    response = replica_client.get('/artist/?Name=Replica')
+    assert len(json.loads(response.get_data(as_text=True))['resources']) == 1
+
+
+def test_read_your_writes(replica_client):
+    """Are writes made to the primary, and visible when the primary header
+    is sent?"""
+    response = replica_client.patch(
+        '/artist/1',
+        data=json.dumps({'Name': 'Written'}),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 200
+    assert artist_name(replica_client) == 'Replica'
+    assert artist_name(
+        replica_client, headers={'X-Read-Your-Writes': '1'}) == 'Written'
+
+
+def test_read_your_writes_with_cache(cached_replica_client):
+    """Do requests for the primary bypass the cache, and are responses read
+    from the replica only cached briefly?"""
+    client = cached_replica_client
+    assert artist_name(client) == 'Replica'
+    client.patch(
+        '/artist/1',
+        data=json.dumps({'Name': 'Written'}),
+        headers={'Content-type': 'application/json'})
+    response = client.get('/artist/1')
+    assert response.json['Name'] == 'Replica'
+    assert client.get('/artist/1').headers['X-Cache'] == 'HIT'
+    response = client.get(
+        '/artist/1',
+        headers={'X-Read-Your-Writes': '1', 'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 200
+    assert response.json['Name'] == 'Written'
+    assert 'X-Cache' not in response.headers
+    time.sleep(0.3)
+    assert client.get('/artist/1').headers['X-Cache'] == 'MISS'
+
+
+def test_unreachable_replica():
+    """Do requests fall back to the primary when the replica can't be
+    reached?"""
+    application = make_app(['sqlite+pysqlite:////nonexistent/replica.sqlite3'])
+    client = application.test_client()
+    try:
+        assert artist_name(client) == 'AC/DC'
+        assert artist_name(client) == 'AC/DC'
+        stats = json.loads(client.get('/_metrics').get_data(as_text=True))
+        assert stats['replicas'][0]['healthy'] is False
+    finally:
+        with application.app_context():
+            db.session.remove()
+        os.unlink(PRIMARY_PATH)
@@ -46,6 +46,18 @@ def test_export_collection(client):
     assert response.headers['Content-type'] == 'text/csv; charset=utf-8'
 
 
+def test_export_collection_streamed(client):
+    """Is an export streamed to the client as properly quoted CSV?"""
+    response = client.get('/artist/?export=True')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert 'ETag' not in response.headers
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0] == 'ArtistId,Name'
+    assert len(lines) == 277
+    assert '49,"Edson, DJ Marky & DJ Patife Featuring Fernanda Porto"' in lines
+
+
 def test_post(client):
     """Can we POST a new resource properly?"""
     response = client.post(
@@ -197,3 +209,222 @@ def test_meta_endpoint(client):
     endpoint?"""
     response = client.get('/artist/meta')
     assert json.loads(response.get_data(as_text=True)) == ARTIST_META
+
+
+def test_get_collection_streamed(app, client):
+    """Is a streamed collection identical to a buffered one?"""
+    expected = client.get('/artist/').get_data()
+    app.config['SANDMAN2_STREAM_COLLECTIONS'] = True
+    response = client.get('/artist/')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.headers['Content-type'] == 'application/json'
+    assert response.get_data() == expected
+
+
+def test_get_collection_ndjson(client):
+    """Can we GET a collection as newline-delimited JSON?"""
+    response = client.get(
+        '/artist/?limit=3', headers={'Accept': 'application/x-ndjson'})
+    assert response.status_code == 200
+    assert response.headers['Content-type'] == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)['ArtistId'] for line in lines] == [1, 2, 3]
+
+
+def test_post_bulk(client):
+    """Can we POST a list of resources in one request?"""
+    response = client.post(
+        '/artist/',
+        data=json.dumps([{'Name': 'Bulk {}'.format(i)} for i in range(5)]),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 201
+    assert json.loads(response.get_data(as_text=True)) == {'resources': [
+        {'status': 201, 'ArtistId': 277 + i, 'self': '/artist/{}'.format(277 + i)}
+        for i in range(5)]}
+    response = client.get('/artist/?Name=Bulk 4')
+    assert len(json.loads(response.get_data(as_text=True))['resources']) == 1
+
+
+def test_post_bulk_order(client):
+    """Are resources sending different fields inserted in the order sent?"""
+    track = {'Name': 'Bulk Track', 'MediaTypeId': 1, 'Milliseconds': 1000, 'UnitPrice': 0.99}
+    response = client.post(
+        '/track/',
+        data=json.dumps([track, dict(track, Composer='Someone'), track]),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 201
+    statuses = json.loads(response.get_data(as_text=True))['resources']
+    assert [status['TrackId'] for status in statuses] == [3504, 3505, 3506]
+    response = client.get('/track/3505')
+    assert json.loads(response.get_data(as_text=True))['Composer'] == 'Someone'
+
+
+def test_post_bulk_partial(client):
+    """Are invalid resources in a list reported while the rest are created?"""
+    response = client.post(
+        '/album/',
+        data=json.dumps([
+            {'Title': 'Bulk Title', 'ArtistId': 1},
+            {'ArtistId': 1},
+            {'Title': 'Bulk Title', 'ArtistId': 1, 'Year': 1999},
+            ]),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 207
+    statuses = json.loads(response.get_data(as_text=True))['resources']
+    assert [status['status'] for status in statuses] == [201, 400, 400]
+    assert statuses[2]['message'] == 'Unknown field [Year]'
+
+
+def test_post_bulk_ndjson(app, client):
+    """Can we POST newline-delimited JSON, in several batches?"""
+    app.config['SANDMAN2_BULK_BATCH_SIZE'] = 2
+    response = client.post(
+        '/artist/',
+        data='\n'.join(json.dumps({'Name': 'Line {}'.format(i)}) for i in range(5)),
+        headers={'Content-type': 'application/x-ndjson'})
+    assert response.status_code == 201
+    response = client.get('/artist/?Name=Line 4')
+    assert len(json.loads(response.get_data(as_text=True))['resources']) == 1
+
+
+def test_post_bulk_conflict(client):
+    """Is a list the database rejects rolled back as a whole?"""
+    response = client.post(
+        '/album/',
+        data=json.dumps([
+            {'Title': 'New Title', 'ArtistId': 1},
+            {'Title': None, 'ArtistId': 1},
+            ]),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 409
+    response = client.get('/album/?Title=New Title')
+    assert json.loads(response.get_data(as_text=True))['resources'] == []
+
+
+def test_patch_collection(client):
+    """Can we update every resource matching a filter in one request?"""
+    response = client.patch(
+        '/album/?ArtistId=1',
+        data=json.dumps({'Title': 'Renamed'}),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 200
+    assert json.loads(response.get_data(as_text=True)) == {'count': 2}
+    response = client.get('/album/?Title=Renamed')
+    albums = json.loads(response.get_data(as_text=True))['resources']
+    assert [album['ArtistId'] for album in albums] == [1, 1]
+
+
+def test_patch_collection_constraint_violation(client):
+    """Is a collection-level PATCH violating a constraint rejected?"""
+    response = client.patch(
+        '/album/?ArtistId=1',
+        data=json.dumps({'Title': None}),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 409
+    response = client.get('/album/?ArtistId=1')
+    assert all(album['Title'] for album in json.loads(response.get_data(as_text=True))['resources'])
+
+
+def test_delete_collection(client):
+    """Can we delete every resource matching a filter in one request?"""
+    response = client.delete('/album/?Title=%25Rock%25')
+    assert response.status_code == 200
+    assert json.loads(response.get_data(as_text=True))['count'] > 0
+    response = client.get('/album/?Title=%25Rock%25')
+    assert json.loads(response.get_data(as_text=True))['resources'] == []
+
+
+def test_delete_collection_without_filter(client):
+    """Is a collection-level DELETE without a filter rejected?"""
+    response = client.delete('/album/')
+    assert response.status_code == 400
+    response = client.get('/album/1')
+    assert response.status_code == 200
+
+
+def test_post_without_probe(app, client):
+    """Is an identical resource created again when probing is disabled?"""
+    app.config['SANDMAN2_POST_PROBE'] = False
+    for _ in range(2):
+        response = client.post(
+            '/artist/',
+            data=json.dumps({'Name': 'Jeff Knupp'}),
+            headers={'Content-type': 'application/json'})
+        assert response.status_code == 201
+
+
+def test_patch_response_matches_get(client):
+    """Does a PATCH respond with the same representation and links as a GET
+    of the updated resource?"""
+    response = client.patch(
+        '/album/6',
+        data=json.dumps({'ArtistId': 3}),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 200
+    expected = client.get('/album/6')
+    assert response.get_data() == expected.get_data()
+    assert response.headers['Link'] == expected.headers['Link']
+
+
+def test_patch_missing(client):
+    """Do we get a 404 if we PATCH a resource that doesn't exist?"""
+    response = client.patch(
+        '/artist/1000',
+        data=json.dumps({'Name': 'Jeff Knupp'}),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 404
+
+
+def test_patch_unknown_field(client):
+    """Do we reject a PATCH with an unknown field?"""
+    response = client.patch(
+        '/artist/1',
+        data=json.dumps({'Age': 32}),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 400
+    assert json.loads(response.get_data(as_text=True))['message'] == 'Unknown field [Age]'
+
+
+def test_get_many_by_primary_key(client):
+    """Can we GET many resources by primary key, in the order requested?"""
+    response = client.get('/artist/?_ids=3,1,1000,2')
+    assert response.status_code == 200
+    body = json.loads(response.get_data(as_text=True))
+    assert [artist['ArtistId'] for artist in body['resources']] == [3, 1, 2]
+    assert body['missing'] == [1000]
+
+
+def test_get_many_by_primary_key_chunked(app, client):
+    """Are large lists of primary keys fetched in several queries?"""
+    app.view_functions['artistservice'].view_class.__batch_get_chunk_size__ = 2
+    try:
+        response = client.get('/artist/?_ids=5,4,3,2,1&fields=Name')
+    finally:
+        del app.view_functions['artistservice'].view_class.__batch_get_chunk_size__
+    body = json.loads(response.get_data(as_text=True))
+    assert len(body['resources']) == 5
+    assert list(body['resources'][0]) == ['Name']
+    assert body['missing'] == []
+
+
+def test_get_many_by_invalid_primary_key(client):
+    """Is a primary key of the wrong type rejected?"""
+    response = client.get('/artist/?_ids=1,one')
+    assert response.status_code == 400
+
+
+def test_pk_is_a_filter(client):
+    """Is a pk parameter taken for a filter on a column, not a list of
+    primary keys?"""
+    response = client.get('/artist/?pk=in:1,2')
+    assert response.status_code == 400
+    assert json.loads(response.get_data(as_text=True))['message'] == 'Invalid field [pk]'
+
+
+def test_delete_collection_in(client):
+    """Can we delete a list of resources by primary key?"""
+    response = client.delete('/album/?AlbumId=in:1,2,3')
+    assert json.loads(response.get_data(as_text=True)) == {'count': 3}
+    response = client.get('/album/?_ids=1,2,3,4')
+    assert json.loads(response.get_data(as_text=True))['missing'] == [1, 2, 3]
@@ -0,0 +1,56 @@
+"""Tests for the field descriptions of registered models."""
+import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Column, Date, DateTime, Time
+
+from sandman2.schema import column_coercer, Schema
+
+
+def get_model(app, name):
+    """Return the registered model named *name*."""
+    for service in app.classes:
+        if service.__model__.__name__ == name:
+            return service.__model__
+    raise KeyError(name)
+
+
+def test_schema_built_at_registration(app):
+    """Is each model's schema built once, when the model is registered?"""
+    model = get_model(app, 'Album')
+    assert isinstance(model.__dict__['__schema__'], Schema)
+    assert model.schema() is model.schema()
+    assert model.required() == ['Title', 'ArtistId']
+    assert model.schema().allowed_fields == {'Title', 'ArtistId'}
+
+
+def test_schema_validation_error(app):
+    """Are unknown and missing fields reported?"""
+    schema = get_model(app, 'Album').schema()
+    assert schema.validation_error({'Title': 'Title', 'ArtistId': 1}) is None
+    assert schema.validation_error({'Title': 'Title', 'Year': 1}) == 'Unknown field [Year]'
+    assert 'ArtistId' in schema.validation_error({'Title': 'Title'})
+
+
+def test_schema_coerce(app):
+    """Are strings converted to the types of their columns?"""
+    schema = get_model(app, 'Invoice').schema()
+    assert schema.coerce('CustomerId', '2') == 2
+    assert schema.coerce('Total', '1.98') == Decimal('1.98')
+    assert schema.coerce('InvoiceDate', '2009-01-01T00:00:00') == datetime.datetime(2009, 1, 1)
+    assert schema.coerce('BillingCity', 'Stuttgart') == 'Stuttgart'
+    with pytest.raises(ValueError):
+        schema.coerce('CustomerId', 'two')
+
+
+def test_column_coercer_dates():
+    """Are ISO 8601 dates, times and datetimes parsed?"""
+    assert column_coercer(Column(Date))('2009-01-02') == datetime.date(2009, 1, 2)
+    assert column_coercer(Column(Time))('10:20:30.5') == datetime.time(10, 20, 30, 500000)
+    coerce = column_coercer(Column(DateTime))
+    assert coerce('2009-01-02 10:20') == datetime.datetime(2009, 1, 2, 10, 20)
+    assert coerce('2009-01-02T10:20:30+01:00') == datetime.datetime(
+        2009, 1, 2, 10, 20, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=1)))
+    with pytest.raises(ValueError):
+        coerce('2009-02-30')
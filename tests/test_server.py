@@ -0,0 +1,89 @@
+"""Tests for running sandman2ctl with production servers."""
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+from sandman2.app import use_shared_cache
+from sandman2.server import check_workers
+
+from tests.test_shared_cache import FakeRedis
+
+DATABASE_PATH = os.path.join('tests', 'data', 'test_server.sqlite3')
+
+
+def free_port():
+    """Return a port nothing is listening on."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get(url, timeout=10):
+    """Return the decoded JSON body of a GET of *url*, retrying until the
+    server has started."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+@pytest.yield_fixture
+def serve():
+    """Yield a function starting sandman2ctl with the given arguments and
+    returning the URL it serves."""
+    shutil.copy(os.path.join('tests', 'data', 'db.sqlite3'), DATABASE_PATH)
+    processes = []
+
+    def start(*args):
+        port = free_port()
+        processes.append(subprocess.Popen(
+            [sys.executable, '-m', 'sandman2', '-l', '-p', str(port)] + list(args) +
+            ['sqlite+pysqlite:///' + DATABASE_PATH],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL))
+        return 'http://127.0.0.1:{}'.format(port)
+    yield start
+    for process in processes:
+        process.terminate()
+        process.wait()
+    os.unlink(DATABASE_PATH)
+
+
+def test_async(serve):
+    """Do requests get served in greenlets with --async?"""
+    pytest.importorskip('gevent')
+    url = serve('--async')
+    assert get(url + '/artist/1') == {'ArtistId': 1, 'Name': 'AC/DC'}
+    assert len(get(url + '/album/?page=1')['resources']) == 20
+
+
+def test_workers(serve):
+    """Do requests get served by forked gunicorn workers with --workers?"""
+    pytest.importorskip('gunicorn')
+    url = serve('--workers', '2', '--threads', '2')
+    assert get(url + '/artist/1') == {'ArtistId': 1, 'Name': 'AC/DC'}
+    assert len(get(url + '/album/?page=1')['resources']) == 20
+
+
+def test_workers_need_shared_state(app):
+    """Are several workers refused a response cache or version ETags which
+    aren't shared between them?"""
+    check_workers(app, 2)
+    app.config['SANDMAN2_ETAG'] = 'version'
+    with pytest.raises(ValueError):
+        check_workers(app, 2)
+    check_workers(app, 1)
+    use_shared_cache(app, FakeRedis())
+    check_workers(app, 2)
@@ -0,0 +1,70 @@
+"""Tests for caching responses in a shared (Redis) server."""
+import json
+
+from pytest_flask.fixtures import client
+
+from sandman2.app import use_shared_cache
+from sandman2.versions import SharedTableVersions
+
+
+class FakeRedis(object):
+
+    """A stand-in for the subset of the Redis client used by sandman2."""
+
+    def __init__(self):
+        self.data = {}
+        self.messages = []
+
+    def get(self, name):
+        """Return the value of *name*."""
+        return self.data.get(name)
+
+    def set(self, name, value, ex=None):  # pylint: disable=unused-argument
+        """Set *name* to *value*."""
+        self.data[name] = value if isinstance(value, bytes) else str(value).encode('utf-8')
+
+    def setnx(self, name, value):
+        """Set *name* to *value* if it isn't set."""
+        if name not in self.data:
+            self.set(name, value)
+
+    def incr(self, name):
+        """Increment the integer stored at *name*."""
+        self.set(name, int(self.data.get(name, 0)) + 1)
+
+    def publish(self, channel, message):
+        """Record *message* as published on *channel*."""
+        self.messages.append((channel, message))
+
+
+def test_shared_cache(app, client):
+    """Are responses cached in the shared server and invalidated by a write
+    from another process?"""
+    redis = FakeRedis()
+    use_shared_cache(app, redis)
+    assert client.get('/artist/1').headers['X-Cache'] == 'MISS'
+    assert client.get('/artist/1').headers['X-Cache'] == 'HIT'
+
+    # another process, with its own connection to the server, writes the table
+    SharedTableVersions(redis).bump('Artist')
+    assert client.get('/artist/1').headers['X-Cache'] == 'MISS'
+    assert client.get('/album/1').headers['X-Cache'] == 'MISS'
+    assert client.get('/_metrics').json['cache']['misses'] == 3
+
+
+def test_shared_cache_write(app, client):
+    """Does a write publish an invalidation message and bump the shared
+    version of the table?"""
+    redis = FakeRedis()
+    use_shared_cache(app, redis)
+    client.get('/artist/1')
+    response = client.patch(
+        '/artist/1',
+        data=json.dumps({'Name': 'Jeff Knupp'}),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 200
+    assert redis.messages == [('sandman2:invalidate', 'Artist')]
+    assert SharedTableVersions(redis).get('Artist') == 1
+    response = client.get('/artist/1')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.json['Name'] == 'Jeff Knupp'
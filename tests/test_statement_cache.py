@@ -0,0 +1,41 @@
+"""Tests for the cache of collection query statements."""
+import json
+
+from pytest_flask.fixtures import client
+
+
+def statement_stats(client):
+    """Return the statement cache's counters."""
+    return json.loads(client.get('/_metrics').get_data(as_text=True))['statements']
+
+
+def test_statement_reused_for_same_shape(client):
+    """Is a statement built once and reused for queries of the same shape but
+    different values?"""
+    before = statement_stats(client)
+    first = client.get('/artist/?ArtistId=in:1,2&sort=-Name')
+    second = client.get('/artist/?ArtistId=in:3,4,5&sort=-Name')
+    after = statement_stats(client)
+    assert after['misses'] == before['misses'] + 1
+    assert after['hits'] == before['hits'] + 1
+    assert [a['ArtistId'] for a in first.json['resources']] == [2, 1]
+    assert [a['ArtistId'] for a in second.json['resources']] == [5, 4, 3]
+
+
+def test_statement_per_shape(client):
+    """Do different shapes get different statements?"""
+    before = statement_stats(client)
+    client.get('/artist/?Name=AC/DC')
+    client.get('/artist/?Name=%25DC')
+    client.get('/artist/?Name=AC/DC&limit=1')
+    assert statement_stats(client)['misses'] == before['misses'] + 3
+
+
+def test_statement_reused_across_pages(client):
+    """Are pages of a collection fetched with the same statement?"""
+    first = client.get('/artist/?page=1')
+    before = statement_stats(client)
+    second = client.get('/artist/?page=2')
+    assert statement_stats(client)['hits'] == before['hits'] + 1
+    assert first.json['resources'][-1]['ArtistId'] == 20
+    assert second.json['resources'][0]['ArtistId'] == 21
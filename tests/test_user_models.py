@@ -3,6 +3,8 @@ import json
 
 from pytest_flask.fixtures import client
 
+from sandman2.model import db
+
 from tests.resources import (
     GET_ERROR_MESSAGE,
     INVALID_ACTION_MESSAGE,
@@ -113,3 +115,52 @@ def test_validate_delete(client):
     response = client.delete('/user/1')
     assert response.status_code == 400
     assert response.json['message'] == INVALID_ACTION_MESSAGE
+
+
+def test_validate_collection_changes(client):
+    """Is each resource changed by a collection-level PATCH or DELETE
+    validated?"""
+    response = client.delete('/user/?id=1')
+    assert response.status_code == 400
+    assert response.json['message'] == INVALID_ACTION_MESSAGE
+    response = client.patch(
+        '/user/?id=1',
+        data=json.dumps({'name': 'Jeff Knupp'}),
+        headers={'Content-Type': 'application/json'})
+    assert response.status_code == 400
+    assert response.json['message'] == INVALID_ACTION_MESSAGE
+    assert db.session.execute('SELECT COUNT(*) FROM user').scalar() == 1
+    response = client.delete('/user/?id=2')
+    assert response.status_code == 200
+    assert response.json == {'count': 0}
+
+
+def test_post_with_primary_key(client, statements):
+    """Is a resource sent with its primary key created with a single
+    statement, and ignored if it already exists?"""
+    response = client.post(
+        '/blog/',
+        data=json.dumps({'id': '7', 'name': 'New Blog'}),
+        headers={'Content-Type': 'application/json'})
+    assert response.status_code == 201
+    assert response.json['name'] == 'New Blog'
+    assert statements[0].startswith('INSERT INTO')
+    assert not any(statement.startswith('INSERT') for statement in statements[1:])
+    response = client.post(
+        '/blog/',
+        data=json.dumps({'id': '7', 'name': 'Other Blog'}),
+        headers={'Content-Type': 'application/json'})
+    assert response.status_code == 204
+    assert client.get('/blog/7').json['name'] == 'New Blog'
+
+
+def test_post_with_null_primary_key(client):
+    """Is a resource sent with a null (required) primary key rejected rather
+    than ignored?"""
+    response = client.post(
+        '/post/',
+        data=json.dumps({'id': None, 'title': 'Untitled'}),
+        headers={'Content-Type': 'application/json'})
+    assert response.status_code == 409
+    with client.application.app_context():
+        assert db.session.execute('SELECT count(*) FROM post WHERE id IS NULL').scalar() == 0
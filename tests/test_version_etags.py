@@ -0,0 +1,42 @@
+"""Tests for ETags derived from table versions."""
+import json
+
+from pytest_flask.fixtures import client
+
+etag = 'version'
+
+
+def test_not_modified_without_query(client, statements):
+    """Is a matching If-None-Match answered without querying the database?"""
+    response = client.get('/artist/')
+    assert response.status_code == 200
+    etag_value = response.headers['ETag']
+    del statements[:]
+    response = client.get('/artist/', headers={'If-None-Match': etag_value})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag_value
+    assert statements == []
+
+
+def test_etag_changes_after_write(client):
+    """Does a write to a table change the ETags of its resources?"""
+    collection_etag = client.get('/artist/').headers['ETag']
+    resource_etag = client.get('/artist/1').headers['ETag']
+    assert collection_etag != resource_etag
+    assert client.get('/album/').headers['ETag'] != collection_etag
+    response = client.patch(
+        '/artist/1',
+        data=json.dumps({'Name': 'Jeff Knupp'}),
+        headers={'Content-type': 'application/json'})
+    assert response.status_code == 200
+    response = client.get('/artist/1', headers={'If-None-Match': resource_etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != resource_etag
+    assert client.get('/artist/').headers['ETag'] != collection_etag
+
+
+def test_etag_mismatch(client):
+    """Do we get a 412 if we don't provide a matching ETag in
+    an If-Match header?"""
+    response = client.get('/artist/1', headers={'If-Match': '"000"'})
+    assert response.status_code == 412